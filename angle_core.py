@@ -0,0 +1,205 @@
+import heapq
+from typing import List, Tuple
+
+
+# TYPED SEARCH CORE
+#
+# The same search as angle_finder.explore(), written against flat lists of
+# integers so it can be compiled:
+#
+#    mypyc angle_core.py
+#
+# which builds an extension module that's imported instead of this file.  If
+# it isn't built, this file is used as is.  Use it through
+# angle_finder.explore_fast(), which converts to and from the usual graph.
+#
+# Motions are numbered 0 to 'count - 1', and 'count' stands for "no motion"
+# (the starting edges).  Costs are integers (angle_finder uses hundredths).
+#
+#    starting_costs[i]        - initial cost of 'starting_angles[i]'
+#    expansions[last]         - list of '(motion, cost)' that can follow 'last'
+#    transitions[motion]      - list of 65536 angles the motion goes to, -1 if
+#                               the motion can't be done from that angle
+#    targets                  - 65536 bytes, 1 for target angles; or empty
+#
+# The graph comes back as flat lists, indexed by 'angle * (count + 1) + motion':
+#
+#    best[angle]              - cheapest cost to the angle, -1 if never reached
+#    edge_cost[index]         - cost of the edge into 'angle' via 'motion', -1
+#                               if there's no such edge
+#    edge_from[index]         - angle the edge comes from
+
+ANGLES = 0xFFFF + 1
+
+
+def explore_core(
+    starting_angles: List[int],
+    starting_costs: List[int],
+    count: int,
+    expansions: List[List[Tuple[int, int]]],
+    transitions: List[List[int]],
+    flex: int,
+    targets: bytes,
+) -> Tuple[List[int], List[int], List[int]]:
+    width = count + 1
+    best: List[int] = [-1] * ANGLES
+    edge_cost: List[int] = [-1] * (ANGLES * width)
+    edge_from: List[int] = [-1] * (ANGLES * width)
+    queue: List[Tuple[int, int, int]] = []
+    seen = 0
+    target_best = -1
+    has_targets = len(targets) > 0
+
+    for i in range(len(starting_angles)):
+        angle = starting_angles[i]
+        start_cost = starting_costs[i]
+        if best[angle] == -1:
+            seen += 1
+        best[angle] = start_cost
+        edge_cost[angle * width + count] = start_cost
+        heapq.heappush(queue, (start_cost, angle, count))
+        if has_targets and targets[angle]:
+            if target_best == -1 or start_cost < target_best:
+                target_best = start_cost
+
+    while len(queue) > 0:
+        if seen == ANGLES:
+            # have encountered all nodes, exit early
+            break
+
+        entry = heapq.heappop(queue)
+        cost = entry[0]
+        angle = entry[1]
+        last = entry[2]
+
+        if target_best != -1 and cost > target_best + flex:
+            # every path to a target within flex has been found
+            break
+
+        if best[angle] < cost:
+            # this edge isn't the cheapest way out
+            continue
+
+        for motion, cost_increase in expansions[last]:
+            to_angle = transitions[motion][angle]
+            if to_angle < 0:
+                continue
+
+            new_cost = cost + cost_increase
+            to_best = best[to_angle]
+            index = to_angle * width + motion
+
+            if to_best == -1:
+                seen += 1
+            elif new_cost > to_best + flex:
+                continue
+            elif edge_cost[index] != -1 and new_cost >= edge_cost[index]:
+                continue
+
+            edge_cost[index] = new_cost
+            edge_from[index] = angle
+            if to_best == -1 or new_cost < to_best:
+                best[to_angle] = new_cost
+
+            if has_targets and targets[to_angle]:
+                if target_best == -1 or new_cost < target_best:
+                    target_best = new_cost
+
+            heapq.heappush(queue, (new_cost, to_angle, motion))
+
+    return best, edge_cost, edge_from
+
+
+# BATCHED SEARCH CORE
+#
+# The cheapest costs under several cost profiles at once.  Motions and
+# transitions are shared; only the costs differ, so
+#
+#    expansions[last]         - list of '(motion, costs)', where 'costs[k]' is
+#                               the motion's cost under profile 'k'
+#    starting_costs[k][i]     - initial cost of 'starting_angles[i]' under 'k'
+#
+# Every profile runs its own Dijkstra over '(angle, previous motion)' states,
+# but they share one queue: most states cost the same under most profiles, so
+# a single pop relaxes all of them together.  Each profile stops once it's
+# past its cheapest target.  Returns 'dist', indexed by
+# 'k * ANGLES * (count + 1) + angle * (count + 1) + previous', -1 where not
+# reached.
+
+
+def explore_batch_core(
+    starting_angles: List[int],
+    starting_costs: List[List[int]],
+    count: int,
+    expansions: List[List[Tuple[int, List[int]]]],
+    transitions: List[List[int]],
+    profiles: int,
+    targets: bytes,
+) -> List[int]:
+    width = count + 1
+    states = ANGLES * width
+    dist: List[int] = [-1] * (profiles * states)
+    relaxed: List[int] = [-1] * (profiles * states)
+    target_best: List[int] = [-1] * profiles
+    queue: List[Tuple[int, int]] = []
+
+    for i in range(len(starting_angles)):
+        angle = starting_angles[i]
+        state = angle * width + count
+        for k in range(profiles):
+            start_cost = starting_costs[k][i]
+            dist[k * states + state] = start_cost
+            heapq.heappush(queue, (start_cost, state))
+            if targets[angle] and (target_best[k] == -1 or start_cost < target_best[k]):
+                target_best[k] = start_cost
+
+    while len(queue) > 0:
+        entry = heapq.heappop(queue)
+        cost = entry[0]
+        state = entry[1]
+
+        done = True
+        for k in range(profiles):
+            if target_best[k] == -1 or cost <= target_best[k]:
+                done = False
+        if done:
+            # every profile has found its cheapest target
+            break
+
+        angle = state // width
+        last = state % width
+        if targets[angle]:
+            continue  # paths stop at the first target
+
+        active: List[int] = []  # profiles to relax from here
+        for k in range(profiles):
+            i = k * states + state
+            if dist[i] != cost or relaxed[i] == cost:
+                continue  # not this profile's cost here, or done already
+            if target_best[k] != -1 and cost > target_best[k]:
+                continue
+            relaxed[i] = cost
+            active.append(k)
+        if len(active) == 0:
+            continue
+
+        for motion, costs in expansions[last]:
+            to_angle = transitions[motion][angle]
+            if to_angle < 0:
+                continue
+            to_state = to_angle * width + motion
+
+            for k in active:
+                new_cost = cost + costs[k]
+                if target_best[k] != -1 and new_cost > target_best[k]:
+                    continue
+                j = k * states + to_state
+                if dist[j] != -1 and dist[j] <= new_cost:
+                    continue
+
+                dist[j] = new_cost
+                heapq.heappush(queue, (new_cost, to_state))
+                if targets[to_angle] and (target_best[k] == -1 or new_cost < target_best[k]):
+                    target_best[k] = new_cost
+
+    return dist
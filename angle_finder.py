@@ -1,8 +1,13 @@
 import collections
 import heapq
+import math
 import sys
+import threading
+import time
 from decimal import *
+from queue import Queue
 
+import angle_core
 import motions
 
 
@@ -15,6 +20,9 @@ import motions
 #      "turn left": 1.0,
 #    means that "turn left" is 2x faster/easier than "ess up".
 #
+# COST_PROFILES --- Costs that depend on the setup, e.g. sidehops before a mask
+# transition.  Pick one with COST_PROFILE or select_cost_profile().
+#
 # COST_CHAINS --- Sequential motions that are faster/slower.
 #      ("ess left", "ess left"): 0.5,
 #    means that every "ess left" preceded by an "ess left" costs 0.5.
@@ -32,6 +40,19 @@ sys.setrecursionlimit(5000) # basic searches can get a lil' wild
 
 COST_FLEX = Decimal(3.0) #Not sure why but setting this higher yields more valid results and less fake ones
 COST_TABLE = {}
+EXPANSIONS = {}  # COST_TABLE rows as lists, minus motions that are never worth expanding
+
+# Drop motions that always land on the same angle as another motion, but never
+# cost less in any context (e.g. "deku 4 frame sidehop" vs "human 3 frame sidehop").
+PRUNE_DOMINATED_MOTIONS = True
+PRUNED_MOTIONS = {}  # pruned motion -> motion that replaces it
+
+# Rough limit, in bytes, on the graph and queue that explore() builds; 'None'
+# for no limit.  Higher COST_FLEX keeps many more edges per node around, so
+# e.g. 3 * 1024**3 keeps large-flex searches inside a 4 GB machine.  With a
+# limit, nodes only keep their cheapest edges, and the queue drops its most
+# expensive entries once it's full, so a few valid paths can be missed.
+MEMORY_CAP = None
 
 MOVEMENT_OPTIONS = {
     "basic": [
@@ -124,36 +145,7 @@ BASIC_COSTS = {
     "first person item backward": Decimal(3.05),
     "deku spin": Decimal(0.9),
     "mask transition": Decimal(1.5),
-
-    # COSTS FOR MASK TRANSITION
-##    "mask hold sidehop left": Decimal(3.25),
-##    "mask hold sidehop right": Decimal(3.25),
-##    "human 4 frame sidehop left": Decimal(3.2),
-##    "human 4 frame sidehop right": Decimal(3.2),
-##    "human 3 frame sidehop left": Decimal(3.15),
-##    "human 3 frame sidehop right": Decimal(3.15),
-##    "human 2 frame sidehop left": Decimal(3.1),
-##    "human 2 frame sidehop right": Decimal(3.1),
-##    "human 1 frame sidehop left": Decimal(3.05),
-##    "human 1 frame sidehop right": Decimal(3.05),
-##    "human tap sidehop left": Decimal(1.5),
-##    "human tap sidehop right": Decimal(1.5),
-
-    # COSTS FOR COLLISION ANGLE (no mask transition)
-    "mask hold sidehop left": Decimal(1.0),
-    "mask hold sidehop right": Decimal(1.0),
-    "human 4 frame sidehop left": Decimal(1.5),
-    "human 4 frame sidehop right": Decimal(1.5),
-    "human 3 frame sidehop left": Decimal(1.5),
-    "human 3 frame sidehop right": Decimal(1.5),
-    "human 2 frame sidehop left": Decimal(1.5),
-    "human 2 frame sidehop right": Decimal(1.5),
-    "human 1 frame sidehop left": Decimal(1.5),
-    "human 1 frame sidehop right": Decimal(1.5),
-    "human tap sidehop left": Decimal(0.5),
-    "human tap sidehop right": Decimal(0.5),
-
-    
+    # human sidehops depend on the cost profile, see COST_PROFILES
     "deku 4 frame sidehop left": Decimal(3.2),
     "deku 4 frame sidehop right": Decimal(3.2),
     "deku 3 frame sidehop left": Decimal(3.15),
@@ -175,6 +167,39 @@ BASIC_COSTS = {
     "goron tap sidehop left": Decimal(1.5),
     "goron tap sidehop right": Decimal(1.5),
 }
+# Costs that depend on what the angle is being set up for.  The selected
+# profile (see select_cost_profile) is added to BASIC_COSTS.
+COST_PROFILES = {
+    "mask transition": {
+        "mask hold sidehop left": Decimal(3.25),
+        "mask hold sidehop right": Decimal(3.25),
+        "human 4 frame sidehop left": Decimal(3.2),
+        "human 4 frame sidehop right": Decimal(3.2),
+        "human 3 frame sidehop left": Decimal(3.15),
+        "human 3 frame sidehop right": Decimal(3.15),
+        "human 2 frame sidehop left": Decimal(3.1),
+        "human 2 frame sidehop right": Decimal(3.1),
+        "human 1 frame sidehop left": Decimal(3.05),
+        "human 1 frame sidehop right": Decimal(3.05),
+        "human tap sidehop left": Decimal(1.5),
+        "human tap sidehop right": Decimal(1.5),
+    },
+    "collision angle": {  # no mask transition
+        "mask hold sidehop left": Decimal(1.0),
+        "mask hold sidehop right": Decimal(1.0),
+        "human 4 frame sidehop left": Decimal(1.5),
+        "human 4 frame sidehop right": Decimal(1.5),
+        "human 3 frame sidehop left": Decimal(1.5),
+        "human 3 frame sidehop right": Decimal(1.5),
+        "human 2 frame sidehop left": Decimal(1.5),
+        "human 2 frame sidehop right": Decimal(1.5),
+        "human 1 frame sidehop left": Decimal(1.5),
+        "human 1 frame sidehop right": Decimal(1.5),
+        "human tap sidehop left": Decimal(0.5),
+        "human tap sidehop right": Decimal(0.5),
+    },
+}
+COST_PROFILE = "collision angle"
 COST_CHAINS = {
     # Consecutive identical movements remove the overhead, so each only costs a frame (0.05s).
     ("ess left", "ess left"): Decimal(0.05),
@@ -186,17 +211,9 @@ COST_CHAINS = {
     ("first person item forward", "first person item forward"): Decimal(0.05),
     ("first person item backward", "first person item backward"): Decimal(0.05),
 
-    # Don't ever consider changing directions for reversible movements.
-    ("ess left", "ess right"): Decimal(100),
-    ("ess right", "ess left"): Decimal(100),
-    ("c-up left", "c-up right"): Decimal(100),
-    ("c-up right", "c-up left"): Decimal(100),
-
-    # Don't consider any paths that have ess after a c-up to remove duplicates.
-    ("c-up left", "ess left"): Decimal(100),
-    ("c-up right", "ess right"): Decimal(100),
-    ("c-up left", "ess right"): Decimal(100),
-    ("c-up right", "ess left"): Decimal(100),
+    # Changing directions for reversible movements, or doing pure rotations in
+    # any order but one (e.g. ess after a c-up), is never expanded at all; see
+    # out_of_order().
 
     # Mask transition after an ess requires entering first person.
     ("ess left", "mask transition"): Decimal(2.9),
@@ -252,11 +269,267 @@ Edge = collections.namedtuple("Edge", ["from_angle", "motion", "cost"])
 empty_node = lambda: Node(edges_in={}, best=None)
 
 
-def maybe_add_edge(graph, edge, to_angle):
+# AngleSet
+#   A set of target angles, built from single angles and (strided, possibly
+#   wrapping) ranges.  Membership is a lookup into a 65536-byte table, so
+#   searching for hundreds of angles costs about the same as searching for one.
+class AngleSet:
+    def __init__(self, angles=()):
+        self.members = bytearray(0xFFFF + 1)
+        self.count = 0
+        for angle in angles:
+            self.add(angle)
+
+    def add(self, angle):
+        angle &= 0xFFFF
+        if not self.members[angle]:
+            self.members[angle] = 1
+            self.count += 1
+
+    def add_range(self, first, last, step=1):
+        """Add 'first', 'first + step', ... up to 'last' inclusive, wrapping past 0xFFFF."""
+        for offset in range(0, ((last - first) & 0xFFFF) + 1, step):
+            self.add(first + offset)
+
+    def __contains__(self, angle):
+        return self.members[angle] == 1
+
+    def __iter__(self):
+        return (angle for angle in range(0xFFFF + 1) if self.members[angle])
+
+    def __len__(self):
+        return self.count
+
+
+def angle_range(first, last, step=1):
+    """AngleSet of 'first' to 'last' inclusive, every 'step' angles."""
+    targets = AngleSet()
+    targets.add_range(first, last, step)
+    return targets
+
+
+# CHEST SRM COLLISION ANGLES
+#
+# The collision angle for an item is its ID in the high byte, plus any flag
+# byte that avoids giving a blue rupee instead.  A movement angle works if
+# colliding with one of the available walls gives one of those angles.
+COLLISION_ITEMS = {
+    "ocarina": 0x00,
+    "bow": 0x01,
+    "fire arrow": 0x02,
+    "ice arrow": 0x03,
+    "light arrow": 0x04,
+    "fairy ocarina oot": 0x05,
+    "bomb": 0x06,  # only gives 1 if you already have bomb bag
+    "bombchus": 0x07,
+    "stick": 0x08,
+    "nut": 0x09,
+    "bean": 0x0a,
+    "fairy slingshot oot": 0x0b,
+    "keg": 0x0c,
+    "pictobox": 0x0d,
+    "lens": 0x0e,
+    "hookshot": 0x0f,
+    "gf sword": 0x10,
+    "longshot oot": 0x11,
+    "bottle": 0x12,
+    "red potion": 0x13,
+    "green potion": 0x14,
+    "blue potion": 0x15,
+    "fairy": 0x16,
+    "deku princess": 0x17,
+    "milk": 0x18,
+    "half milk": 0x19,
+    "fish": 0x1a,
+    "bug": 0x1b,
+    "blue fire oot": 0x1c,
+    "poe": 0x1d,
+    "big poe": 0x1e,
+    "spring water": 0x1f,
+    "hot spring water": 0x20,
+    "zora egg": 0x21,
+    "gold dust": 0x22,
+    "magic mushroom": 0x23,
+    "sea horse": 0x24,
+    "chateau romani": 0x25,
+    "hylian loach beta": 0x26,
+    "obabas drink beta": 0x27,
+    "moons tear": 0x28,
+    "land title deed": 0x29,
+    "swamp title deed": 0x2a,
+    "mountain title deed": 0x2b,
+    "ocean title deed": 0x2c,
+    "room key": 0x2d,
+    "expressmail": 0x2e,
+    "letter": 0x2f,
+    "pendant": 0x30,
+    "tingles map": 0x31,
+    "deku mask": 0x32,
+    "goron mask": 0x33,
+    "zora mask": 0x34,
+    "fd mask": 0x35,
+    "mask of truth": 0x36,
+    "kafeis mask": 0x37,
+    "all night mask": 0x38,
+    "bunny hood": 0x39,
+    "keaton mask": 0x3a,
+    "garos mask": 0x3b,
+    "romanis mask": 0x3c,
+    "circus leaders mask": 0x3d,
+    "postmans hat": 0x3e,
+    "couples mask": 0x3f,
+    "gf mask": 0x40,
+    "gibdo mask": 0x41,
+    "don geros mask": 0x42,
+    "kamaros mask": 0x43,
+    "captains hat": 0x44,
+    "stone mask": 0x45,
+    "bremen mask": 0x46,
+    "blast mask": 0x47,
+    "mask of scents": 0x48,
+    "giants mask": 0x49,
+    "fire bow": 0x4a,
+    "ice bow": 0x4b,
+    "light bow": 0x4c,
+    "kokiri sword": 0x4d,
+    "razor sword": 0x4e,
+    "gilded sword": 0x4f,
+    "fd sword": 0x50,
+    "heros shield": 0x51,
+    "mirror shield": 0x52,
+    "quiver": 0x53,
+    "large quiver": 0x54,
+    "largest quiver": 0x55,
+    "bomb bag": 0x56,
+    "big bomb bag": 0x57,
+    "biggest bomb bag": 0x58,
+    "child wallet beta": 0x59,
+    "adult wallet": 0x5a,
+    "giant wallet": 0x5b,
+    "fishing rod oot": 0x5c,
+    "odolwas remains": 0x5d,
+    "gohts remains": 0x5e,
+    "gyorgs remains": 0x5f,
+    "twinmolds remains": 0x60,
+    "sonata": 0x61,
+    "lullaby": 0x62,
+    "nwbn": 0x63,
+    "elegy": 0x64,
+    "oath": 0x65,
+    "sarias song": 0x66,
+    "song of time": 0x67,
+    "song of healing": 0x68,
+    "eponas song": 0x69,
+    "song of soaring": 0x6a,
+    "song of storms": 0x6b,
+    "suns song": 0x6c,
+    "bombers notebook": 0x6d,
+    "gold skulltula token": 0x6e,
+    "heart container": 0x6f,
+    "piece of heart": 0x70,
+    "x40 bit 1ef72d": 0x71,
+    "x50 bit 1ef72d": 0x72,
+    "lullaby intro": 0x73,
+    "boss key": 0x74,
+    "compass": 0x75,
+    "dungeon map": 0x76,
+    "stray fairy": 0x77,
+    "small key": 0x78,
+    "magic jar": 0x79,
+    "magic jar 2": 0x7a,
+    "piece of heart 2": 0x7b,
+    "glitched ocarina slot": 0x7c,
+    "glitched third bottle slot": 0x7d,
+    "glitched ocarina slot 2": 0x7e,
+    "glitched ocarina slot 3": 0x7f,
+    "glitched ocarina slot 4": 0x80,
+}
+FLAG_MASKS = {
+    "empty slot": 0xBF,
+    "full slot": 0xDF,
+    "always safe": 0x9F,  # always safe, but fewer results
+}
+COLLISION_TARGETS = {}  # (walls, item, slot) -> AngleSet
+
+
+def collision_targets(walls, item, slot="full slot"):
+    """
+    AngleSet of US 1.0 movement angles that give the named item's collision
+    angle against any of the walls.  Cached per (walls, item, slot).
+    """
+
+    key = (frozenset(walls), item, slot)
+
+    if key not in COLLISION_TARGETS:
+        mask = FLAG_MASKS[slot]
+        cangs = {(COLLISION_ITEMS[item] << 8) + (mask & flag) for flag in range(0xFF + 1)}
+
+        targets = AngleSet()
+        for wall in key[0]:
+            for cang in cangs:
+                targets.add(abs(wall + cang) % 0x8000)
+        COLLISION_TARGETS[key] = targets
+
+    return COLLISION_TARGETS[key]
+
+
+# ExploreStats
+#   Optional instrumentation for explore().  Pass an instance in to have it
+#   filled out; leaving it as 'None' keeps the search loop free of bookkeeping.
+class ExploreStats:
+    def __init__(self):
+        self.pushes = 0           # entries pushed onto the priority queue
+        self.pops = 0             # entries popped off the priority queue
+        self.stale_pops = 0       # popped entries whose edge was since replaced by a cheaper one
+        self.flex_rejected = 0    # edges costing more than the node's best + COST_FLEX
+        self.motion_rejected = 0  # edges no cheaper than a known edge via the same motion
+        self.skipped_nodes = 0    # pops skipped by edges_out() since they weren't the node's best
+        self.camera_skipped = 0   # camera motions skipped, already tried as cheaply for the snap
+        self.evicted = 0          # edges dropped to keep within MEMORY_CAP
+        self.motion_time = 0.0    # seconds spent inside motion functions
+        self.queue_time = 0.0     # seconds spent pushing/popping the priority queue
+        self.elapsed = 0.0        # seconds spent in explore() overall
+        self.queue_size = 0       # size of the queue as of the last update
+        self.cost = 0             # cost of the most recently popped entry
+
+    def __str__(self):
+        return "\n".join([
+            f"queue:   {self.pushes} pushes, {self.pops} pops ({self.stale_pops} stale), {self.queue_size} left",
+            f"edges:   {self.flex_rejected} over COST_FLEX, {self.motion_rejected} beaten via same motion",
+            f"nodes:   {self.skipped_nodes} pops skipped as not the cheapest way out, {self.evicted} edges evicted",
+            f"camera:  {self.camera_skipped} motions skipped as already tried for the same snap",
+            f"time:    {self.motion_time:.3f}s motions, {self.queue_time:.3f}s queue, {self.elapsed:.3f}s total",
+        ])
+
+
+def start_costs(starting_angles):
+    """
+    Dict of starting angle -> initial cost.  'starting_angles' is either a
+    dict of the same (e.g. to weigh setups that take longer), or any iterable
+    of angles, which all start at 0.  That includes dicts of angle -> anything
+    but a number, like cardinals_dict, whose keys are the angles.  A dict with
+    costs for only some of its angles raises TypeError.
+    """
+
+    if isinstance(starting_angles, dict):
+        numbers = [isinstance(cost, (int, float, Decimal)) for cost in starting_angles.values()]
+        if all(numbers):
+            return {angle: cost if isinstance(cost, Decimal) else Decimal(str(cost))
+                    for angle, cost in starting_angles.items()}
+        if any(numbers):
+            raise TypeError("starting angles need a cost for every angle, or for none")
+    return {angle: 0 for angle in starting_angles}
+
+
+def maybe_add_edge(graph, edge, to_angle, stats=None, max_edges=None):
     """
     Add an edge to an angle, but only if the edge is the fastest way to get to
     the node for a given motion.
 
+    If 'max_edges' is given, the node keeps at most that many of its cheapest
+    edges, and edges that end up more than COST_FLEX over the node's best are
+    dropped.
+
     Returns True if the edge was added, False if it wasn't.
     """
 
@@ -271,36 +544,119 @@ def maybe_add_edge(graph, edge, to_angle):
         best = min_none(to_node.best, edge.cost)
         graph[to_angle] = Node(edges_in, best)
 
-    if to_node.best == None:
-        add_edge()  # first edge to the node
+        if max_edges is not None:
+            evict_edges(edges_in, best, max_edges, stats)
+            return edge.motion in edges_in  # might not have made the cut
         return True
 
+    if to_node.best == None:
+        return add_edge()  # first edge to the node
+
     if edge.cost > to_node.best + COST_FLEX:
         # edge costs too much
+        if stats is not None:
+            stats.flex_rejected += 1
         return False
 
     if (edge.motion not in edges_in) or (edge.cost < edges_in[edge.motion].cost):
         # first edge via this motion, or cheaper than the previous edge via this motion
-        add_edge()
-        return True
+        return add_edge()
 
     # have already found this node, via this motion, at least as quickly
+    if stats is not None:
+        stats.motion_rejected += 1
     return False
 
 
-def edges_out(graph, angle, last_motion, last_cost):
+def evict_edges(edges_in, best, max_edges, stats=None):
+    """
+    Drop edges that cost more than 'best' + COST_FLEX (they can't be on any
+    path navigate_all() returns), then the most expensive edges past
+    'max_edges'.  Starting edges are always kept, and don't count toward
+    'max_edges', so a weighted start reached more cheaply keeps that edge too.
+    """
+
+    evict = [motion for motion, edge in edges_in.items()
+             if motion is not None and edge.cost > best + COST_FLEX]
+
+    if len(edges_in) - len(evict) > max_edges:
+        kept = sorted((edge.cost, motion) for motion, edge in edges_in.items()
+                      if motion is not None and motion not in evict)
+        evict.extend(motion for _, motion in kept[max_edges:])
+
+    for motion in evict:
+        del edges_in[motion]
+    if stats is not None:
+        stats.evicted += len(evict)
+
+
+def memory_limits(memory_cap):
+    """
+    Split 'memory_cap' bytes between the graph and the queue.  Returns
+    '(edges kept per node, queue entries)'.
+    """
+
+    edge = Edge(0xFFFF, "ess left", Decimal(1.0))
+    edge_bytes = sys.getsizeof(edge) + sys.getsizeof(edge.cost) + 3 * 8  # plus a dict slot
+    entry_bytes = sys.getsizeof((edge.cost, 0xFFFF, "ess left", "ess left")) + 8  # plus a list slot
+
+    max_edges = max(1, (memory_cap // 2) // ((0xFFFF + 1) * edge_bytes))
+    max_queue = max(0xFFFF + 1, (memory_cap // 2) // entry_bytes)
+    return max_edges, max_queue
+
+
+def compact_queue(graph, queue, max_queue):
+    """
+    Drop queue entries whose edge has since been replaced or evicted, then the
+    most expensive entries past half of 'max_queue', so that compacting
+    doesn't happen again straight away.
+    """
+
+    def live(entry):
+        (cost, angle, _, motion) = entry
+        edge = graph[angle].edges_in.get(motion)
+        return edge is not None and edge.cost == cost
+
+    queue[:] = [entry for entry in queue if live(entry)]
+    if len(queue) > max_queue // 2:
+        queue[:] = heapq.nsmallest(max_queue // 2, queue)
+    heapq.heapify(queue)
+
+
+def edges_out(graph, angle, last_motion, last_cost, stats=None, camera_memo=None):
     """
     Iterator of edges out of an angle, given some particular previous motion and
     cost.  Needs the previous motion to calculate the cost of a chained motion.
+
+    If 'camera_memo' is given (a dict, kept across calls), motions in
+    motions.CAMERA_MOTIONS are skipped when they've already been tried, at
+    most as expensively, from an angle that snaps to the same place: they'd
+    give the same edge again, which maybe_add_edge() would turn down.
     """
 
     if graph[angle].best < last_cost:
         # skip all edges if this edge isn't the cheapest way out
         # misses some valid edges, but it doesn't seem to matter much
+        if stats is not None:
+            stats.skipped_nodes += 1
         return
 
-    for (motion, cost_increase) in COST_TABLE[last_motion].items():
-        new_angle = motions.table[motion](angle)
+    for (motion, cost_increase) in EXPANSIONS[last_motion]:
+        if camera_memo is not None and motion in motions.CAMERA_MOTIONS:
+            key = (motion, motions.snap_class(angle))
+            tried = camera_memo.get(key)
+            if tried is not None and tried <= last_cost + cost_increase:
+                if stats is not None:
+                    stats.camera_skipped += 1
+                continue
+            camera_memo[key] = last_cost + cost_increase
+
+        if stats is None:
+            new_angle = motions.table[motion](angle)
+        else:
+            start = time.perf_counter()
+            new_angle = motions.table[motion](angle)
+            stats.motion_time += time.perf_counter() - start
 
         if new_angle is None:
             continue
@@ -312,22 +668,103 @@ def edges_out(graph, angle, last_motion, last_cost):
         yield (to_angle, Edge(from_angle, motion, cost))
 
 
-def explore(starting_angles):
-    """Produce a graph from the given starting angles."""
+def explore(starting_angles, targets=None, stats=None, progress=None, progress_every=10000,
+            on_settled=None, deadline=None, cancel=None, on_stopped=None, bound=None,
+            on_found=None):
+    """
+    Produce a graph from the given starting angles (see start_costs()).  An
+    angle with an initial cost starts out that expensive, and can still be
+    reached more cheaply from another starting angle.
+
+    If 'targets' is given (an AngleSet, or any iterable of angles), exploring
+    stops once nothing left in the queue could reach one of them within
+    COST_FLEX of the cheapest.  If 'on_settled' is given too, it's called as
+    'on_settled(graph, angle)' for each reached target, cheapest first, as
+    soon as every path to it within COST_FLEX of its own best is in the graph;
+    exploring then goes on until every target within COST_FLEX of the
+    cheapest is settled.  If 'on_found' is given, it's called as
+    'on_found(graph, angle, lower_bound)' each time a target is reached more
+    cheaply than any before, though maybe not yet by its cheapest path: no
+    path not yet in the graph costs less than 'lower_bound'.
+
+    If MEMORY_CAP is set, the graph and queue are kept roughly within it.
+
+    If 'bound' is given (the cost of some path to a target, e.g. from
+    linear_upper_bound()), edges costing more than 'bound + COST_FLEX' are
+    never added, since they can't be on a path to a target within COST_FLEX of
+    the cheapest.
+
+    Exploring stops early once time.perf_counter() passes 'deadline', or once
+    'cancel' (a threading.Event) is set.  The graph then only has what was
+    found so far, and 'on_stopped(graph, lower_bound)' is called if given:
+    any path not yet in the graph costs at least 'lower_bound'.  Targets that
+    weren't settled by then aren't passed to 'on_settled'.
+
+    If 'stats' is an ExploreStats, it's filled out as the search runs.  If
+    'progress' is given, it's called with the stats every 'progress_every'
+    pops off the queue (and once more at the end).
+    """
+
+    if progress is not None and stats is None:
+        stats = ExploreStats()
+    if stats is not None:
+        explore_start = time.perf_counter()
+
+    if targets is not None and not isinstance(targets, AngleSet):
+        targets = AngleSet(targets)
+    target_best = None  # cheapest cost to any target so far
+    unsettled = []      # priority queue of '(best, target_angle)' for 'on_settled'
+    settled = set()
+
+    def settle(bound):
+        # targets whose best is more than COST_FLEX under 'bound' can't change
+        while unsettled and (bound is None or unsettled[0][0] + COST_FLEX < bound):
+            (best, angle) = heapq.heappop(unsettled)
+            if best == graph[angle].best and angle not in settled:
+                settled.add(angle)
+                on_settled(graph, angle)
+
+    max_edges = None
+    if MEMORY_CAP is not None:
+        max_edges, max_queue = memory_limits(MEMORY_CAP)
 
     graph = [empty_node() for _ in range(0xFFFF + 1)]
-    queue = []  # priority queue of '(edge_cost, from_angle, last_motion)'
+    # priority queue of '(edge_cost, from_angle, tie, last_motion)', where
+    # 'tie' is the motion's name, or "" for a starting angle (None can't be
+    # compared with a name when cost and angle are equal)
+    queue = []
     seen = 0
 
-    for angle in starting_angles:
-        edges_in = {None: Edge(from_angle=None, motion=None, cost=0)}
-        best = 0
+    # evicted edges could need adding again, so only skip repeated camera
+    # motions without a memory cap
+    camera_memo = {} if max_edges is None else None
+
+    # settling goes on up to COST_FLEX past the cheapest target, so targets up
+    # to there need their paths within COST_FLEX too
+    limit = None
+    if bound is not None:
+        limit = bound + (2 * COST_FLEX if on_settled is not None else COST_FLEX)
+
+    starts = start_costs(starting_angles)
+    for angle, start_cost in starts.items():
+        edges_in = {None: Edge(from_angle=None, motion=None, cost=start_cost)}
+        best = start_cost
 
         graph[angle] = Node(edges_in, best)
-        heapq.heappush(queue, (Decimal(0.0), angle, None))
+        heapq.heappush(queue, (start_cost, angle, "", None))
         seen += 1
+        if stats is not None:
+            stats.pushes += 1
+        if targets is not None and angle in targets:
+            if target_best is None or start_cost < target_best:
+                target_best = start_cost
+                if on_found is not None:
+                    on_found(graph, angle, min(starts.values()))
+            if on_settled is not None:
+                heapq.heappush(unsettled, (start_cost, angle))
 
     previous_cost = 0  # only print status when cost increases
+    stopped = None     # lower bound on what's left, if stopped early
 
     while len(queue) > 0:
         if seen == (0xFFFF + 1):
@@ -335,37 +772,810 @@ def explore(starting_angles):
             # misses some valid edges, but it doesn't seem to matter much
             break
 
-        (cost, angle, motion) = heapq.heappop(queue)
+        if stats is None:
+            (cost, angle, _, motion) = heapq.heappop(queue)
+        else:
+            start = time.perf_counter()
+            (cost, angle, _, motion) = heapq.heappop(queue)
+            stats.queue_time += time.perf_counter() - start
+            stats.pops += 1
+            stats.cost = cost
+
+            edge = graph[angle].edges_in.get(motion)
+            if edge is not None and edge.cost < cost:
+                stats.stale_pops += 1
+
+            if progress is not None and stats.pops % progress_every == 0:
+                stats.queue_size = len(queue)
+                stats.elapsed = time.perf_counter() - explore_start
+                progress(stats)
+
+        if unsettled:
+            settle(cost)
+
+        if target_best is not None and cost > target_best + COST_FLEX:
+            # every path to a target within COST_FLEX has been found, but
+            # targets costing more than the cheapest may not be settled yet
+            if not unsettled or unsettled[0][0] > target_best + COST_FLEX:
+                break
+
+        if ((deadline is not None and time.perf_counter() > deadline)
+                or (cancel is not None and cancel.is_set())):
+            # out of time; this entry and everything left cost at least 'cost'
+            stopped = cost
+            break
 
         if cost > previous_cost + Decimal(1.0):
             print(f"Exploring ({len(queue)}), current cost at {cost}", end="\r")
             previous_cost = cost
 
-        for to_angle, edge in edges_out(graph, angle, motion, cost):
+        for to_angle, edge in edges_out(graph, angle, motion, cost, stats, camera_memo):
+            if limit is not None and edge.cost > limit:
+                if stats is not None:
+                    stats.flex_rejected += 1
+                continue
+
             if graph[to_angle].best == None:
                 seen += 1
 
-            if maybe_add_edge(graph, edge, to_angle):
+            if maybe_add_edge(graph, edge, to_angle, stats, max_edges):
+                if targets is not None and to_angle in targets:
+                    if target_best is None or edge.cost < target_best:
+                        target_best = edge.cost
+                        if on_found is not None:
+                            on_found(graph, to_angle, cost)
+                    if on_settled is not None and edge.cost == graph[to_angle].best:
+                        heapq.heappush(unsettled, (edge.cost, to_angle))
+
                 # this is a new or cheaper edge, explore from here
-                heapq.heappush(queue, (edge.cost, to_angle, edge.motion))
+                if stats is None:
+                    heapq.heappush(queue, (edge.cost, to_angle, edge.motion, edge.motion))
+                else:
+                    start = time.perf_counter()
+                    heapq.heappush(queue, (edge.cost, to_angle, edge.motion, edge.motion))
+                    stats.queue_time += time.perf_counter() - start
+                    stats.pushes += 1
+
+        if max_edges is not None and len(queue) > max_queue:
+            compact_queue(graph, queue, max_queue)
+
+    if stopped is None:
+        settle(None)
+
+    if stats is not None:
+        stats.queue_size = len(queue)
+        stats.elapsed = time.perf_counter() - explore_start
+        if progress is not None:
+            progress(stats)
+
+    if stopped is not None:
+        print(f"\nStopped early, nothing left costs under {stopped}.")
+        if on_stopped is not None:
+            on_stopped(graph, stopped)
+        return graph
 
     print("\nDone.")
     return graph
 
 
-# A path is a list of motions, e.g. ["ess up", "ess up", "turn left"].
+# angle_core.py has a typed copy of explore() that can be compiled with mypyc
+# for speed.  explore_fast() runs it with integer costs (hundredths) and
+# returns the same graph explore() would.  The motions' transitions are cached
+# since they never change.
+COST_SCALE = 100
+TRANSITION_TABLES = {}  # motion -> list of 65536 angles, -1 where impossible
+
+
+def transition_table(motion):
+    if motion not in TRANSITION_TABLES:
+        TRANSITION_TABLES[motion] = [-1 if a is None else a for a in transitions(motion)]
+    return TRANSITION_TABLES[motion]
+
+
+def to_units(cost):
+    units = cost * COST_SCALE
+    if units != int(units):
+        raise ValueError(f"cost {cost} isn't a whole number of hundredths")
+    return int(units)
+
+
+def from_units(units):
+    """
+    Decimal cost from hundredths, written with as many significant digits as
+    the context's precision, the way explore()'s sums come out (e.g. 1.300).
+    """
+    cost = Decimal(units) / COST_SCALE
+    if not cost:
+        return cost
+    return cost.quantize(Decimal(1).scaleb(cost.adjusted() - getcontext().prec + 1))
+
+
+def explore_fast(starting_angles, targets=None):
+    """Same as explore(), using the typed core in angle_core.py."""
+
+    allowed = [m for m in motions.table if m in COST_TABLE]
+    index = {motion: i for i, motion in enumerate(allowed)}
+    index[None] = len(allowed)
+
+    expansions = [None] * (len(allowed) + 1)
+    for first, row in EXPANSIONS.items():
+        expansions[index[first]] = [(index[m], to_units(cost)) for m, cost in row]
+
+    if targets is None:
+        members = b""
+    elif isinstance(targets, AngleSet):
+        members = bytes(targets.members)
+    else:
+        members = bytes(AngleSet(targets).members)
+
+    starts = start_costs(starting_angles)
+    best, edge_cost, edge_from = angle_core.explore_core(
+        list(starts), [to_units(cost) for cost in starts.values()], len(allowed), expansions,
+        [transition_table(m) for m in allowed], to_units(COST_FLEX), members)
+
+    # back to the usual graph of Nodes and Edges
+    motions_by_index = allowed + [None]
+    width = len(motions_by_index)
+    graph = [empty_node() for _ in range(0xFFFF + 1)]
+    decimals = {}  # integer cost -> Decimal cost
+
+    def to_decimal(units):
+        if units not in decimals:
+            decimals[units] = from_units(units)
+        return decimals[units]
+
+    for i, units in enumerate(edge_cost):
+        if units < 0:
+            continue
+        (angle, motion) = divmod(i, width)
+        motion = motions_by_index[motion]
+        from_angle = None if motion is None else edge_from[i]
+        graph[angle].edges_in[motion] = Edge(from_angle, motion, to_decimal(units))
+
+    for angle, units in enumerate(best):
+        if units >= 0:
+            graph[angle] = Node(graph[angle].edges_in, to_decimal(units))
+
+    return graph
+
+
+# Calibrating costs means comparing results under many candidate profiles.
+# explore_profiles() runs them all in one search with the batched core in
+# angle_core.py, instead of one initialize_cost_table() and explore() each.
+# Dominated motions aren't pruned here, since that depends on the costs.
+def explore_profiles(starting_angles, targets, profiles):
+    """
+    Cheapest path to any of the targets under each of several cost profiles,
+    each either the name of one of COST_PROFILES, or a dict of costs to put on
+    top of the current profile (e.g. '{"human tap sidehop left": 1.5}').
+
+    Returns a list with a '(cost, angle, path)' for each profile, like
+    collect_paths() gives, or None where no target can be reached.
+    """
+
+    if not isinstance(targets, AngleSet):
+        targets = AngleSet(targets)
+
+    tables = []
+    for profile in profiles:
+        if isinstance(profile, str):
+            profile_costs = COST_PROFILES[profile]
+        else:
+            profile_costs = dict(COST_PROFILES[COST_PROFILE])
+            profile_costs.update({m: c if isinstance(c, Decimal) else Decimal(c)
+                                  for m, c in profile.items()})
+        tables.append(build_cost_table(profile_costs))
+
+    allowed = [m for m in motions.table if m in COST_TABLE]
+    index = {motion: i for i, motion in enumerate(allowed)}
+    index[None] = len(allowed)
+    width = len(allowed) + 1
+
+    expansions = [[] for _ in range(width)]
+    for first in [None] + allowed:
+        for motion in allowed:
+            if not out_of_order(first, motion):
+                costs = [to_units(table[first][motion]) for table in tables]
+                expansions[index[first]].append((index[motion], costs))
+
+    starts = start_costs(starting_angles)
+    transitions = [transition_table(m) for m in allowed]
+    dist = angle_core.explore_batch_core(
+        list(starts), [[to_units(cost) for cost in starts.values()]] * len(profiles),
+        len(allowed), expansions, transitions, len(profiles), bytes(targets.members))
+
+    # which '(previous, cost)' each motion can follow, for walking back
+    follows = [[] for _ in allowed]
+    for first, row in enumerate(expansions):
+        for motion, costs in row:
+            follows[motion].append((first, costs))
+
+    states = (0xFFFF + 1) * width
+    results = []
+
+    for k in range(len(profiles)):
+        reached = [(dist[k * states + angle * width + last], angle, last)
+                   for angle in targets for last in range(width)
+                   if dist[k * states + angle * width + last] >= 0]
+        if not reached:
+            results.append(None)
+            continue
+
+        (units, angle, last) = min(reached)
+        path = []
+        while last != len(allowed):
+            # find the state this one was reached from
+            motion = allowed[last]
+            offset = motions.linear_offset(motion)
+            if offset is not None:
+                from_angles = [(angle - offset) & 0xFFFF]
+            else:
+                from_angles = preimages(motion).get(angle, ())
+            cost = dist[k * states + angle * width + last]
+
+            found = None
+            for from_angle in from_angles:
+                for previous, costs in follows[last]:
+                    before = dist[k * states + from_angle * width + previous]
+                    if before >= 0 and before + costs[k] == cost:
+                        found = (from_angle, previous)
+                        break
+                if found is not None:
+                    break
+            if found is None:
+                raise RuntimeError(f"no state leads to {angle:#06x} by \"{motion}\" "
+                                   f"at cost {cost} under profile {profiles[k]!r}")
+
+            path.append(motion)
+            (angle, last) = found
+
+        results.append((from_units(units), angle, Path.from_motions(reversed(path))))
+
+    return results
+
+
+# Searches using only pure rotations (see motions.linear_offset) are the same
+# from every starting angle, so one graph explored from 0x0000 gives the cost
+# to every offset, and a start->target query is a lookup of the offset
+# '(target - start) & 0xFFFF'.  Graphs are cached per cost table.
+#
+# With several starting angles, each start is searched on its own, so the
+# paths can differ from a single explore() of all of them (the best cost is
+# the same).  explore() drops a path from one start once another start gets
+# to the same angle more than COST_FLEX cheaper, and stops once every angle
+# has been seen; here every start keeps the paths from its own offset graph.
+LINEAR_GRAPHS = {}
+
+
+def is_linear():
+    """Whether every motion that can be expanded is a pure rotation."""
+    expanded = {m for row in EXPANSIONS.values() for m, _ in row}
+    return all(motions.linear_offset(m) is not None for m in expanded)
+
+
+def cost_table_key():
+    """Hashable key for everything that changes what explore() finds."""
+    return (COST_FLEX, tuple((first, tuple(row)) for first, row in EXPANSIONS.items()))
+
+
+def explore_linear():
+    """Graph of the cheapest ways to rotate by each offset, from 0x0000."""
+
+    key = cost_table_key()
+    if key not in LINEAR_GRAPHS:
+        LINEAR_GRAPHS[key] = explore([0x0000])
+    return LINEAR_GRAPHS[key]
+
+
+# A quick upper bound for explore(): the cost of a way to a target using only
+# the allowed pure rotations.  Those costs only depend on the offset, so one
+# run of the typed core from 0x0000 covers every start and target; it's
+# cached per cost table.
+LINEAR_BOUNDS = {}  # cost_table_key() -> costs in hundredths, -1 if unreachable
+
+
+def linear_upper_bound(starting_angles, targets):
+    """
+    An upper bound on the cost of the cheapest path from a starting angle to a
+    target: the cost of a path using only pure rotations (see
+    motions.linear_offset), or None if there isn't one.  It isn't necessarily
+    the cheapest such path, since explore_core() skips some edges.
+    """
+
+    key = cost_table_key()
+    if key not in LINEAR_BOUNDS:
+        rotations = [m for m in motions.table
+                     if m in COST_TABLE and motions.linear_offset(m) is not None]
+        index = {motion: i for i, motion in enumerate(rotations)}
+        index[None] = len(rotations)
+
+        expansions = [[] for _ in range(len(rotations) + 1)]
+        for first, row in EXPANSIONS.items():
+            if first in index:
+                expansions[index[first]] = [(index[m], to_units(cost))
+                                            for m, cost in row if m in index]
+
+        best, _, _ = angle_core.explore_core(
+            [0x0000], [0], len(rotations), expansions,
+            [transition_table(m) for m in rotations], 0, b"")
+        LINEAR_BOUNDS[key] = best
+
+    offsets = LINEAR_BOUNDS[key]
+    targets = list(targets)
+    costs = [offsets[(angle - start) & 0xFFFF] + to_units(start_cost)
+             for start, start_cost in start_costs(starting_angles).items()
+             for angle in targets
+             if offsets[(angle - start) & 0xFFFF] >= 0]
+    return from_units(min(costs)) if costs else None
+
+
+def linear_cost(offset_graph, starting_angles, angle):
+    """Best cost to an angle from any of the starting angles; None if unreachable."""
+    costs = [(offset_graph[(angle - start) & 0xFFFF].best, start_cost)
+             for start, start_cost in start_costs(starting_angles).items()]
+    costs = [cost + start_cost for cost, start_cost in costs if cost is not None]
+    return min(costs) if costs else None
+
+
+# Reachability, ignoring costs: pure rotations only ever move an angle within
+# its residue class modulo the gcd of their offsets (and 0x10000), so each
+# class is reached or not as a whole.  Other motions are followed through
+# their transition tables, from every angle of each newly reached class.  With
+# only pure rotations this is a handful of slices, so hopeless searches can be
+# turned down before exploring.
+def reached_classes(starting_angles, allowed=None):
+    """
+    '(step, classes)': every angle 'a' with 'a % step' in 'classes' can be
+    reached from the starting angles using the allowed motions (by default,
+    the ones in COST_TABLE), and no other angle can.
+    """
+
+    if allowed is None:
+        allowed = [m for m in motions.table if m in COST_TABLE]
+
+    step = 0xFFFF + 1
+    others = []
+    for motion in allowed:
+        offset = motions.linear_offset(motion)
+        if offset is None:
+            others.append(motion)
+        else:
+            step = math.gcd(step, offset)
+    tables = [transition_table(motion) for motion in others]
+
+    classes = {angle % step for angle in starting_angles}
+    work = list(classes)
+    while work and tables:
+        first = work.pop()
+        for angle in range(first, 0xFFFF + 1, step):
+            for table in tables:
+                to_angle = table[angle]
+                if to_angle >= 0 and to_angle % step not in classes:
+                    classes.add(to_angle % step)
+                    work.append(to_angle % step)
+
+    return step, classes
+
+
+def is_reachable(starting_angles, targets, allowed=None):
+    """Whether any target can be reached at all, by reached_classes()."""
+    if not isinstance(targets, AngleSet):
+        targets = AngleSet(targets)
+    (step, classes) = reached_classes(starting_angles, allowed)
+    return any(any(targets.members[first::step]) for first in classes)
+
+
+def enabling_groups(starting_angles, targets):
+    """
+    MOVEMENT_OPTIONS groups that aren't allowed, but would make a target
+    reachable if they were.
+    """
+
+    allowed = [m for m in motions.table if m in COST_TABLE]
+    return [group for group, group_motions in MOVEMENT_OPTIONS.items()
+            if group not in ALLOWED_GROUPS
+            and is_reachable(starting_angles, targets, allowed + group_motions)]
+
+
+# Searching backwards from the targets gives the cheapest cost from every
+# angle at once, so all the candidate starts can be ranked in one pass instead
+# of exploring forward from each.  Since chained motions cost less, the state
+# is '(angle, previous motion)'; costs are in hundredths, as in explore_fast().
+# Motions are inverted through PREIMAGES, or by subtracting their offset if
+# they're pure rotations.
+PREIMAGES = {}  # motion -> {angle: list of angles the motion takes to it}
+
+
+def preimages(motion):
+    if motion not in PREIMAGES:
+        inverse = collections.defaultdict(list)
+        for angle, to_angle in enumerate(transition_table(motion)):
+            if to_angle >= 0:
+                inverse[to_angle].append(angle)
+        PREIMAGES[motion] = dict(inverse)
+    return PREIMAGES[motion]
+
+
+def explore_reverse(targets):
+    """
+    Cheapest cost from every angle to any of the targets.  Returns
+    '(costs, steps, allowed)', flat lists indexed by
+    'angle * (len(allowed) + 1) + previous', where 'previous' is the index of
+    the previous motion in 'allowed', or 'len(allowed)' for none:
+
+        costs[index]  - cost in hundredths to a target, -1 if unreachable
+        steps[index]  - index of the motion to do next, -1 at a target
+    """
+
+    allowed = [m for m in motions.table if m in COST_TABLE]
+    index = {motion: i for i, motion in enumerate(allowed)}
+    index[None] = len(allowed)
+    width = len(allowed) + 1
+
+    # for each motion, the previous motions it can follow and its cost then
+    follows = [[] for _ in allowed]
+    for first, row in EXPANSIONS.items():
+        for motion, cost in row:
+            follows[index[motion]].append((index[first], to_units(cost)))
+
+    inverses = []
+    for motion in allowed:
+        offset = motions.linear_offset(motion)
+        inverses.append(offset if offset is not None else preimages(motion))
+
+    costs = [-1] * ((0xFFFF + 1) * width)
+    steps = [-1] * ((0xFFFF + 1) * width)
+    queue = []
+
+    for angle in targets:
+        for previous in range(width):
+            costs[angle * width + previous] = 0
+        for motion in range(len(allowed)):
+            queue.append((0, angle, motion))
+    heapq.heapify(queue)
+
+    while queue:
+        (cost, angle, motion) = heapq.heappop(queue)
+        if costs[angle * width + motion] < cost:
+            continue  # already reached more cheaply
+
+        # the state '(angle, motion)' is reached by doing 'motion' from each
+        # '(from_angle, previous)' that it can follow
+        inverse = inverses[motion]
+        if isinstance(inverse, int):
+            from_angles = [(angle - inverse) & 0xFFFF]
+        else:
+            from_angles = inverse.get(angle, ())
+
+        for from_angle in from_angles:
+            for previous, cost_increase in follows[motion]:
+                i = from_angle * width + previous
+                new_cost = cost + cost_increase
+                if costs[i] == -1 or new_cost < costs[i]:
+                    costs[i] = new_cost
+                    steps[i] = motion
+                    if previous != len(allowed):
+                        heapq.heappush(queue, (new_cost, from_angle, previous))
+
+    return costs, steps, allowed
+
+
+def rank_starting_angles(starting_angles, targets):
+    """
+    Every starting angle that can reach a target, cheapest first, as a list
+    of '(cost, angle, path)' like collect_paths(), with one cheapest path
+    each.  Found with a single explore_reverse().
+    """
+
+    (costs, steps, allowed) = explore_reverse(targets)
+    width = len(allowed) + 1
+    tables = [transition_table(motion) for motion in allowed]
+
+    ranked = []
+    for start, start_cost in start_costs(starting_angles).items():
+        units = costs[start * width + len(allowed)]
+        if units < 0:
+            continue
+        units += to_units(start_cost)
+
+        path = []
+        (angle, previous) = (start, len(allowed))
+        while steps[angle * width + previous] >= 0:
+            previous = steps[angle * width + previous]
+            angle = tables[previous][angle]
+            path.append(allowed[previous])
+
+        ranked.append((from_units(units), start, Path.from_motions(path)))
+
+    ranked.sort()
+    return ranked
+
+
+# Label setting: a search over several criteria at once.  Each path to a
+# state '(angle, previous motion)' carries a label, a tuple of integers whose
+# first entry is the time cost in hundredths; the rest depends on the search
+# (e.g. the number of inputs).  Every criterion only grows along a path, so
+# labels are popped in tuple order, and a label is dropped if another one at
+# the same state is no worse in every entry.  The paths left at the targets
+# are the Pareto frontier: none is beaten in every criterion by another.
+def dominated(label, labels, length=None):
+    """Whether any of 'labels' is no worse than 'label' in the first 'length' entries."""
+    if length is None:
+        length = len(label)
+    return any(all(other[i] <= label[i] for i in range(length)) for other in labels)
+
+
+def label_setting(starting_angles, targets, initial, extend, objectives=None,
+                  accept=None, flex=COST_FLEX, expansions=None):
+    """
+    Pareto frontier of the paths from the starting angles to the targets.
+
+    'initial' is the label at a starting angle (its time is replaced by the
+    angle's initial cost), and 'extend(label, motion, units)' gives the label
+    after doing 'motion', which costs 'units' hundredths there, or None if
+    the motion isn't allowed.
+
+    Only the first 'objectives' entries of labels (by default all of them)
+    are compared between paths at the targets; the rest only matter at the
+    same state, e.g. counts that 'extend' limits.  If 'accept(label, motion)'
+    is given, a path only counts once it's true at a target.  Paths taking
+    more than 'flex' longer than the quickest are ignored.  'expansions' is
+    used instead of EXPANSIONS if given.
+
+    Returns a list of '(label, angle, path)', quickest first, where 'angle' is
+    the starting angle and 'path' a Path.
+    """
+
+    if not isinstance(targets, AngleSet):
+        targets = AngleSet(targets)
+    if objectives is None:
+        objectives = len(initial)
+    if expansions is None:
+        expansions = EXPANSIONS
+    flex_units = to_units(flex)
+
+    settled = collections.defaultdict(list)  # (angle, previous motion) -> labels
+    frontier = []  # of '(label, angle, record)'
+    bound = None   # latest time worth looking at, once a target is reached
+    queue = []     # priority queue of '(label, count, angle, previous, record)'
+    count = 0      # tie breaker, since records can't be compared
+
+    # records link back to the start: '(angle, motion, previous record)'
+    for angle, start_cost in start_costs(starting_angles).items():
+        label = (to_units(start_cost),) + tuple(initial[1:])
+        queue.append((label, count, angle, None, (angle, None, None)))
+        count += 1
+    heapq.heapify(queue)
+
+    while queue:
+        (label, _, angle, previous, record) = heapq.heappop(queue)
+        if bound is not None and label[0] > bound:
+            break
+
+        labels = settled[(angle, previous)]
+        if dominated(label, labels):
+            continue
+        labels.append(label)
+
+        if dominated(label, [other for other, _, _ in frontier], objectives):
+            continue  # everything from here is no better than a path already found
+
+        if angle in targets and (accept is None or accept(label, previous)):
+            frontier.append((label, angle, record))
+            if bound is None:
+                bound = label[0] + flex_units
+            continue
+
+        for motion, cost in expansions[previous]:
+            to_angle = transition_table(motion)[angle]
+            if to_angle < 0:
+                continue
+            new_label = extend(label, motion, to_units(cost))
+            if new_label is None or (bound is not None and new_label[0] > bound):
+                continue
+            if dominated(new_label, settled[(to_angle, motion)]):
+                continue
+            heapq.heappush(queue, (new_label, count, to_angle, motion, (to_angle, motion, record)))
+            count += 1
+
+    results = []
+    for label, _, record in frontier:
+        path = []
+        while record[1] is not None:
+            path.append(record[1])
+            record = record[2]
+        results.append((label, record[0], Path.from_motions(reversed(path))))
+    return results
+
+
+def pareto_paths(starting_angles, targets, flex=COST_FLEX):
+    """
+    Paths to the targets that are best for some trade-off between time (as
+    in COST_TABLE), the number of inputs, and the number of camera dependent
+    motions (motions.CAMERA_MOTIONS), from label_setting().
+
+    Returns a list of '(cost, inputs, camera, angle, path)', quickest first.
+    """
+
+    def extend(label, motion, units):
+        (time, inputs, camera) = label
+        return (time + units, inputs + 1, camera + (motion in motions.CAMERA_MOTIONS))
+
+    frontier = label_setting(starting_angles, targets, (0, 0, 0), extend, flex=flex)
+    return [(from_units(time), inputs, camera, angle, path)
+            for (time, inputs, camera), angle, path in frontier]
+
+
+def motion_names(names):
+    """Set of the motions in 'names', each a motion or a MOVEMENT_OPTIONS group."""
+    if isinstance(names, str):
+        names = [names]
+    result = set()
+    for name in names:
+        if name in MOVEMENT_OPTIONS:
+            result.update(MOVEMENT_OPTIONS[name])
+        elif name in motions.table:
+            result.add(name)
+        else:
+            raise ValueError(f"unknown motion or group \"{name}\"")
+    return result
+
+
+def constrained_paths(starting_angles, targets, max_counts=None, forbidden=(),
+                      forbidden_pairs=(), end_with=None, flex=COST_FLEX):
+    """
+    Cheapest path to the targets within some limits, enforced while searching
+    (see label_setting()) rather than by filtering paths afterwards.  Motions
+    can be given by name or by MOVEMENT_OPTIONS group.
+
+        max_counts       - dict of motion or group -> most times it's used,
+                           plus "inputs" for motions in total and "camera" for
+                           motions.CAMERA_MOTIONS, e.g. '{"c-up": 3}'
+        forbidden        - motions or groups never to use
+        forbidden_pairs  - '(first, then)' motions or groups that can't come
+                           straight after each other
+        end_with         - motions or groups the path has to end with
+
+    Returns a list with the '(cost, angle, path)' of the cheapest path, like
+    find_paths() gives, or an empty list if there isn't one.  Raises
+    ValueError for a name that's neither a motion nor a group.
+    """
+
+    limits = []  # of '(motions, most uses)'
+    for name, most in (max_counts or {}).items():
+        if name == "inputs":
+            limits.append((set(motions.table), most))
+        elif name == "camera":
+            limits.append((motions.CAMERA_MOTIONS, most))
+        else:
+            limits.append((motion_names(name), most))
+
+    forbidden = motion_names(forbidden)
+    pairs = {(first, then) for firsts, thens in forbidden_pairs
+             for first in motion_names(firsts) for then in motion_names(thens)}
+    ends = None if end_with is None else motion_names(end_with)
+
+    # Forbidden motions and pairs are never expanded.  Dominated motions are
+    # kept, since the motion that replaces one might be limited, and every
+    # order of pure rotations is kept if the order matters here.
+    ordered = ends is not None or pairs
+    expansions = {}
+    for first, row in COST_TABLE.items():
+        expansions[first] = [(m, cost) for m, cost in row.items()
+                             if m not in forbidden and (first, m) not in pairs
+                             and (ordered or not out_of_order(first, m))]
+
+    def extend(label, motion, units):
+        counts = list(label[1:])
+        for i, (limited, most) in enumerate(limits):
+            if motion in limited:
+                counts[i] += 1
+                if counts[i] > most:
+                    return None
+        return (label[0] + units,) + tuple(counts)
+
+    def accept(label, motion):
+        return ends is None or motion in ends
+
+    frontier = label_setting(starting_angles, targets, (0,) * (len(limits) + 1), extend,
+                             objectives=1, accept=accept, flex=flex, expansions=expansions)
+    return [(from_units(label[0]), angle, path) for label, angle, path in frontier[:1]]
+
+
+# Path
+#   A run-length encoded sequence of motions.  e.g. 84 "ess left" followed by
+#   2 "c-up right" is stored as the runs '((1, 84), (6, 2))', pairs of
+#   (motion id, count), using the ids in motions.ids.  Iterating over a Path
+#   gives the motions one at a time, like a list of motions would.
+class Path:
+    __slots__ = ("runs",)
+
+    def __init__(self, runs=()):
+        self.runs = tuple(runs)
+
+    @classmethod
+    def from_motions(cls, path):
+        """Path from any sequence of motions, e.g. ["ess up", "ess up", "turn left"]."""
+        if isinstance(path, Path):
+            return path
+        runs = []
+        for motion in path:
+            id = motions.ids[motion]
+            if runs and runs[-1][0] == id:
+                runs[-1][1] += 1
+            else:
+                runs.append([id, 1])
+        return cls((id, count) for id, count in runs)
+
+    @classmethod
+    def parse(cls, text):
+        """Path from its string form, e.g. "84 ess left, 2 c-up right"."""
+        runs = []
+        for run in text.split(","):
+            if run.strip():
+                count, motion = run.strip().split(" ", 1)
+                runs.append((motions.ids[motion], int(count)))
+        return cls(runs)
+
+    def canonical(self):
+        """
+        The runs with every stretch of pure rotations merged and sorted, since
+        those can be done in any order.  Paths with the same canonical runs
+        from the same angle are equivalent.
+        """
+
+        key = []
+        block = collections.Counter()
+
+        for id, count in self.runs:
+            if motions.linear_offset(motions.names[id]) is None:
+                key.extend(sorted(block.items()))
+                block.clear()
+                key.append((id, count))
+            else:
+                block[id] += count
+
+        key.extend(sorted(block.items()))
+        return tuple(key)
+
+    def named_runs(self):
+        """Iterator of (motion, count)."""
+        return ((motions.names[id], count) for id, count in self.runs)
+
+    def __iter__(self):
+        for motion, count in self.named_runs():
+            for _ in range(count):
+                yield motion
+
+    def __len__(self):
+        return sum(count for _, count in self.runs)
+
+    def __eq__(self, other):
+        return isinstance(other, Path) and self.runs == other.runs
+
+    def __lt__(self, other):
+        return self.runs < other.runs
+
+    def __hash__(self):
+        return hash(self.runs)
+
+    def __str__(self):
+        return ", ".join(f"{count} {motion}" for motion, count in self.named_runs())
+
+    def __repr__(self):
+        return f"Path.parse({str(self)!r})"
 
 
 def cost_of_path(path):
     cost = 0
     last = None
-    for next in path:
-        cost += COST_TABLE[last][next]
+    for next, count in Path.from_motions(path).named_runs():
+        cost += COST_MATRIX[cost_index(last, next)] + (count - 1) * COST_MATRIX[cost_index(next, next)]
         last = next
     return cost
 
 
-def navigate_all(graph, angle, path=None, seen=None, flex=COST_FLEX):
+def navigate_all(graph, angle, runs=None, seen=None, flex=COST_FLEX, cost=0):
     """
     Iterator of paths to a given angle, whose costs differ from the best
     path by no more than COST_FLEX.
@@ -376,24 +1586,42 @@ def navigate_all(graph, angle, path=None, seen=None, flex=COST_FLEX):
     not ordered except for the first.
 
     Yields values of the form
-        (angle, path)
-    where 'angle' is an integer 0x0000-0xFFFF, and 'path' is a list of motions.
+        (cost, angle, path)
+    where 'cost' is the cost of the path (as cost_of_path() would give) plus
+    the initial cost of its starting angle, 'angle' is an integer
+    0x0000-0xFFFF, and 'path' is a Path.
     """
 
     # 'flex' starts at the maximum permissible deviation from the optimal path.
     # As the function recurses, 'flex' decreases by the deviation from optimal
     # at each node.
+    #
+    # 'runs' is the path so far as a stack of [motion id, count], latest motion
+    # first.  'cost' is the running cost of every motion in it except the
+    # earliest one, whose cost depends on the motion before it; it's added as
+    # each earlier motion is found.
 
-    if path is None:
+    if runs is None:
         # instantiate new objects in case the function is called multiple times
-        path = []
+        runs = []
         seen = set()
 
     node = graph[angle]
-
-    if None in node.edges_in:
-        # this is a starting node
-        yield angle, list(reversed(path))
+    start = node.edges_in.get(None)
+
+    if start is not None and start.cost <= node.best + flex:
+        # this is a starting node; paths can also go on through it if it has
+        # an initial cost (see start_costs) and there's a cheaper way here
+        start_cost = cost
+        if runs:
+            start_cost += COST_MATRIX[runs[-1][0]]
+        if start.cost:
+            start_cost += start.cost
+        yield start_cost, angle, Path((id, count) for id, count in reversed(runs))
+
+    if start is not None and start.cost == 0:
+        # nothing through a free starting node can be cheaper than starting there
+        pass
 
     elif angle in seen:
         # found a cycle (possible by e.g. 'ess left'->'ess right', where 'flex'
@@ -416,42 +1644,46 @@ def navigate_all(graph, angle, path=None, seen=None, flex=COST_FLEX):
                 # ran out of flex!  any paths from here will cost too much
                 break
 
-            path.append(edge.motion)
-            yield from navigate_all(graph, edge.from_angle, path, seen, new_flex)
-            path.pop()
+            if edge.motion is None:
+                continue  # starting here was handled above
+
+            id = motions.ids[edge.motion]
+            new_cost = cost
+
+            if runs and runs[-1][0] == id:
+                new_cost += COST_MATRIX[(id + 1) * MOTION_COUNT + id]
+                runs[-1][1] += 1
+                yield from navigate_all(graph, edge.from_angle, runs, seen, new_flex, new_cost)
+                runs[-1][1] -= 1
+            else:
+                if runs:
+                    new_cost += COST_MATRIX[(id + 1) * MOTION_COUNT + runs[-1][0]]
+                runs.append([id, 1])
+                yield from navigate_all(graph, edge.from_angle, runs, seen, new_flex, new_cost)
+                runs.pop()
 
         seen.remove(angle)
 
 
 def print_path(angle, description, path):
-    # keep track of repeated motions to simplify the path reading
-    prev_motion    = None
-    iterations     = 1
+    # repeated motions are already grouped together in a Path
     motions_output = []
 
     print("start at {:#06x}: ".format(angle)+description)
 
-    for motion in path:
-        if prev_motion == motion:
-            # keep track of how many times a motion is repeated
-            iterations += 1
-        elif prev_motion:
-            # once it stops repeating, add it to the motion list
-            motions_output.append({
-                "motion": f"{iterations} {prev_motion}",
-                "angle":  f"0x{angle:04x}"
-            })
-            iterations = 1
-
-        # update the angle using the current motion and set prev_motion
-        angle = motions.table[motion](angle) & 0xFFFF
-        prev_motion = motion
-
-    # finally, run one last time
-    motions_output.append({
-        "motion": f"{iterations} {prev_motion}",
-        "angle":  f"0x{angle:04x}"
-    })
+    for motion, count in Path.from_motions(path).named_runs():
+        # update the angle using each repetition of the motion
+        for _ in range(count):
+            angle = motions.table[motion](angle) & 0xFFFF
+
+        motions_output.append({
+            "motion": f"{count} {motion}",
+            "angle":  f"0x{angle:04x}"
+        })
+
+    if not motions_output:
+        # already at the desired angle
+        return
 
     # get the padding amount based on the length for the largest motion string
     text_length = len(max([output["motion"] for output in motions_output], key=len))
@@ -460,44 +1692,534 @@ def print_path(angle, description, path):
         print(f"{motion['motion']:<{text_length}} to {motion['angle']}")
 
 
-def collect_paths(graph, angle, sample_size=20, number=10):
+# Verification
+#   start    - integer starting angle, as given
+#   path     - the Path replayed
+#   angles   - angle after each run of the path, up to where it failed if it did
+#   final    - angle at the end; None if a motion can't be done where it's used
+#   cost     - cost_of_path(); None if the path uses motions that aren't allowed
+#   best     - cost of the cheapest path from 'start' to 'final' with the
+#              allowed motions; None if not compared or unreachable
+#   error    - why the candidate couldn't be replayed (e.g. an unknown motion,
+#              or a starting angle out of range), in which case 'path' and
+#              everything after it is None or empty; None otherwise
+Verification = collections.namedtuple(
+    "Verification", ["start", "path", "angles", "final", "cost", "best", "error"],
+    defaults=[None])
+
+EXACT_COSTS = {}  # (starting angle, cost_table_key()) -> from exact_costs()
+
+
+def exact_costs(start):
+    """
+    Cheapest cost in hundredths from 'start' to every angle, -1 where it can't
+    be reached.  Unlike explore(), nothing is cut short: this runs the batched
+    core in angle_core.py for the current costs until every state is done.
+    """
+
+    allowed = [m for m in motions.table if m in COST_TABLE]
+    index = {motion: i for i, motion in enumerate(allowed)}
+    index[None] = len(allowed)
+    width = len(allowed) + 1
+
+    expansions = [[] for _ in range(width)]
+    for first, row in EXPANSIONS.items():
+        expansions[index[first]] = [(index[m], [to_units(cost)]) for m, cost in row]
+
+    dist = angle_core.explore_batch_core(
+        [start], [[0]], len(allowed), expansions,
+        [transition_table(m) for m in allowed], 1, bytes(0xFFFF + 1))
+
+    costs = []
+    for angle in range(0xFFFF + 1):
+        reached = [d for d in dist[angle * width:(angle + 1) * width] if d >= 0]
+        costs.append(min(reached) if reached else -1)
+    return costs
+
+
+def verify_paths(candidates, compare=True):
+    """
+    Replay many '(start, path)' candidates, where 'path' is a Path, its
+    string form or a list of motions.  Returns a Verification for each; a
+    candidate that can't be read gets one with its 'error' set, rather than
+    stopping the rest.
+
+    Runs of pure rotations take one step each, whatever their length; other
+    motions go through their transition tables.  If 'compare' is true, each
+    path is checked against the cheapest path to its final angle, from
+    exact_costs() once per starting angle (or just once if every motion is a
+    pure rotation), cached.
+    """
+
+    linear = compare and is_linear()
+    key = cost_table_key()
+    offsets = {}  # motion id -> offset, or transition table if not a pure rotation
+    results = []
+
+    for start, path in candidates:
+        if not isinstance(start, int) or not 0 <= start <= 0xFFFF:
+            results.append(Verification(start, None, [], None, None, None,
+                                        f"starting angle {start!r} isn't in 0x0000-0xFFFF"))
+            continue
+
+        try:
+            if isinstance(path, str):
+                path = Path.parse(path)
+            else:
+                path = Path.from_motions(path)
+        except KeyError as e:
+            results.append(Verification(start, None, [], None, None, None, f"unknown motion {e}"))
+            continue
+        except ValueError as e:
+            results.append(Verification(start, None, [], None, None, None,
+                                        f"can't read path {path!r}: {e}"))
+            continue
+
+        angle = start
+        angles = []
+        for id, count in path.runs:
+            if id not in offsets:
+                motion = motions.names[id]
+                offset = motions.linear_offset(motion)
+                offsets[id] = transition_table(motion) if offset is None else offset
+
+            step = offsets[id]
+            if isinstance(step, int):
+                angle = (angle + count * step) & 0xFFFF
+            else:
+                for _ in range(count):
+                    angle = step[angle]
+                    if angle < 0:
+                        break
+            if angle < 0:
+                angle = None
+                break
+            angles.append(angle)
+
+        allowed = all(motions.names[id] in COST_TABLE for id, _ in path.runs)
+        cost = cost_of_path(path) if allowed else None
+
+        best = None
+        if compare and angle is not None:
+            (origin, to_angle) = (0x0000, (angle - start) & 0xFFFF) if linear else (start, angle)
+            if (origin, key) not in EXACT_COSTS:
+                EXACT_COSTS[(origin, key)] = exact_costs(origin)
+            units = EXACT_COSTS[(origin, key)][to_angle]
+            if units >= 0:
+                best = from_units(units)
+
+        results.append(Verification(start, path, angles, angle, cost, best))
+
+    return results
+
+
+def collect_paths(graph, angle, sample_size=20, number=10, deadline=None, cancel=None):
     """Sample 'sample_size' paths, returning the 'number' cheapest of those.
 
+    Paths that only reorder the same pure rotations (see Path.canonical) count
+    once, keeping the cheapest.  Sampling stops early (after at least one
+    path) once time.perf_counter() passes 'deadline' or 'cancel' is set.
+
     Returns a list of
         (cost, angle, path)
     where 'cost' is the float cost, 'angle' is an integer 0x0000-0xFFFF,
-    and 'path' is a list of motions.
+    and 'path' is a Path.
     """
 
-    paths = []
+    paths = {}  # (angle, canonical runs) -> (cost, angle, path)
 
-    for angle, path in navigate_all(graph, angle):
-        paths.append((cost_of_path(path), angle, path))
+    for cost, angle, path in navigate_all(graph, angle):
+        key = (angle, path.canonical())
 
-        if len(paths) == sample_size:
+        if key not in paths:
+            paths[key] = (cost, angle, path)
+            if len(paths) == sample_size:
+                break
+        elif (cost, path) < (paths[key][0], paths[key][2]):
+            paths[key] = (cost, angle, path)
+
+        if ((deadline is not None and time.perf_counter() > deadline)
+                or (cancel is not None and cancel.is_set())):
             break
 
+    paths = sorted(paths.values())
+    return paths[:number]
+
+
+def collect_target_paths(graph, targets, sample_size=20, number=10):
+    """
+    Like collect_paths(), but for a set of target angles: paths are collected
+    to every target whose best cost is within COST_FLEX of the cheapest target.
+    """
+
+    reached = [angle for angle in targets if graph[angle].best is not None]
+    if not reached:
+        return []
+
+    cheapest = min(graph[angle].best for angle in reached)
+    paths = []
+
+    for angle in reached:
+        if graph[angle].best <= cheapest + COST_FLEX:
+            paths.extend(collect_paths(graph, angle, sample_size, number))
+
     paths.sort()
     return paths[:number]
 
 
-def initialize_cost_table():
-    COST_TABLE[None] = BASIC_COSTS.copy()
+def stream_events(starting_angles, targets, sample_size=20, number=10,
+                  deadline=None, cancel=None, found=False):
+    """
+    Generator of '(kind, angle, paths, lower_bound)' as exploring goes on, on
+    a worker thread.  'paths' is as from collect_paths(), and 'kind' is one of
+
+        "found"    - only if 'found' is true: 'angle' is a target reached more
+                     cheaply than any before, and 'paths' the cheapest path to
+                     it so far; no path not found yet costs less than
+                     'lower_bound'
+        "settled"  - 'angle' is a target within COST_FLEX of the cheapest, with
+                     its paths as good as a full search's
+        "stopped"  - exploring stopped early (see explore()), with nothing
+                     left costing less than 'lower_bound'; no angle or paths
+        "reached"  - after "stopped", a target reached but not settled,
+                     cheapest first; its paths might not be the cheapest
+
+    Each settled target's paths are collected (as the caller iterates) while
+    exploring goes on to settle the rest.
+    """
+
+    events = Queue()  # of '(kind, ...)' from the worker, then 'None' once done
+    failure = []
+    context = getcontext().copy()  # Decimal precision is per thread
+
+    def on_found(graph, angle, bound):
+        # the graph keeps changing, so take the path while exploring waits
+        events.put(("found", angle, [next(navigate_all(graph, angle))], bound))
+
+    def worker():
+        setcontext(context)
+        try:
+            explore(starting_angles, targets=targets,
+                    on_settled=lambda graph, angle: events.put(("settled", graph, angle)),
+                    deadline=deadline, cancel=cancel,
+                    on_stopped=lambda graph, bound: events.put(("stopped", graph, bound)),
+                    on_found=on_found if found else None)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            events.put(None)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+
+    cheapest = None
+    done = set()
+    stopped = None
+
+    try:
+        while True:
+            item = events.get()
+            if item is None:
+                break
+
+            if item[0] == "found":
+                yield item
+                continue
+            if item[0] == "stopped":
+                stopped = item[1:]
+                continue
+
+            (_, graph, angle) = item
+            best = graph[angle].best
+            if cheapest is None:
+                cheapest = best
+            elif best > cheapest + COST_FLEX:
+                continue
+
+            done.add(angle)
+            yield "settled", angle, collect_paths(graph, angle, sample_size, number,
+                                                  deadline, cancel), None
+    finally:
+        thread.join()
+
+    if failure:
+        raise failure[0]
+
+    if stopped is not None:
+        (graph, bound) = stopped
+        yield "stopped", None, [], bound
+
+        reached = sorted((graph[angle].best, angle) for angle in targets
+                         if graph[angle].best is not None and angle not in done)
+        for best, angle in reached:
+            if cheapest is None:
+                cheapest = best
+            elif best > cheapest + COST_FLEX:
+                break
+            yield "reached", angle, collect_paths(graph, angle, sample_size, number,
+                                                  deadline, cancel), bound
+
+
+def stream_paths(starting_angles, targets, sample_size=20, number=10,
+                 deadline=None, cancel=None, on_stopped=None):
+    """
+    Generator of '(angle, paths)' for each target within COST_FLEX of the
+    cheapest, where 'paths' is as from collect_paths().  Exploring runs on a
+    worker thread, and each target's paths are collected (as the caller
+    iterates) as soon as exploring has settled it, cheapest target first,
+    while exploring goes on to settle the others.
+
+    With a 'deadline' or 'cancel' (see explore()), exploring can stop before
+    every target is settled.  Then 'on_stopped(lower_bound)' is called if
+    given, and the targets reached but not settled come last, cheapest first;
+    their paths might not be the cheapest there are.
+    """
+
+    for kind, angle, paths, bound in stream_events(starting_angles, targets, sample_size,
+                                                   number, deadline, cancel):
+        if kind == "stopped":
+            if on_stopped is not None:
+                on_stopped(bound)
+        else:
+            yield angle, paths
+
+
+def anytime_paths(starting_angles, targets, sample_size=20, number=10, timeout=None, cancel=None):
+    """
+    Generator of '(paths, lower_bound)', where 'paths' are the 'number'
+    cheapest paths to the targets found so far (like find_paths() gives).
+
+    Until a target is settled, each cheaper target reached gives its cheapest
+    path so far, with the least any path not found yet could cost as
+    'lower_bound'.  After that, 'paths' is updated each time another target's
+    paths are collected (see stream_paths()), and 'lower_bound' is None: the
+    first path is the cheapest there is.
+
+    If 'timeout' seconds pass, or 'cancel' (a threading.Event) is set, before
+    exploring is done, it stops and the targets reached by then are used.
+    'lower_bound' is then the least any path not found yet could cost.  If it
+    stops before any target is settled, the paths found so far (maybe none)
+    come with that lower bound first.
+    """
+
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    provisional = []  # cheapest path so far, until a target is settled
+    found = []
+    stopped = None
+
+    for kind, angle, paths, bound in stream_events(starting_angles, targets, sample_size,
+                                                   number, deadline, cancel, found=True):
+        if kind == "found":
+            provisional = paths
+            yield provisional, bound
+        elif kind == "stopped":
+            stopped = bound
+            if not found:
+                yield provisional, bound
+        else:
+            found = sorted(found + paths)[:number]
+            yield found, stopped
+
+
+def collect_linear_paths(offset_graph, starting_angles, targets, sample_size=20, number=10):
+    """
+    Like collect_target_paths(), but using a graph from explore_linear(),
+    translated to each of the starting angles.  With more than one start, the
+    paths can differ from explore()'s (see LINEAR_GRAPHS).
+    """
+
+    starts = start_costs(starting_angles)
+    pairs = []
+    for start, start_cost in starts.items():
+        for angle in targets:
+            offset = (angle - start) & 0xFFFF
+            if offset_graph[offset].best is not None:
+                pairs.append((offset_graph[offset].best + start_cost, start, offset))
+    if not pairs:
+        return []
+
+    cheapest = min(pairs)[0]
+    paths = []
+
+    for best, start, offset in pairs:
+        if best > cheapest + COST_FLEX:
+            continue
+        for cost, _, path in collect_paths(offset_graph, offset, sample_size, number):
+            if starts[start]:
+                cost += starts[start]
+            paths.append((cost, start, path))
+
+    paths.sort()
+    return paths[:number]
+
+
+def transitions(motion):
+    """List of where a motion takes every angle (None if it can't be done)."""
+    function = motions.table[motion]
+    result = []
+    for angle in range(0xFFFF + 1):
+        new_angle = function(angle)
+        result.append(None if new_angle is None else new_angle & 0xFFFF)
+    return result
 
-    for motion, cost in BASIC_COSTS.items():
-        COST_TABLE[motion] = BASIC_COSTS.copy()
+
+def dominates(keep, drop):
+    """
+    Whether swapping 'drop' for 'keep' anywhere in a path never makes the path
+    cost more, according to COST_TABLE.
+    """
+
+    for last, row in COST_TABLE.items():
+        if last != drop and row[keep] > row[drop]:
+            return False
+    for next, cost in COST_TABLE[drop].items():
+        if next != drop and COST_TABLE[keep][next] > cost:
+            return False
+    return COST_TABLE[keep][keep] <= COST_TABLE[drop][drop]
+
+
+def prune_dominated_motions():
+    """
+    Find allowed motions that are dominated by another allowed motion: same
+    resulting angle from every starting angle, and never any cheaper.  Returns
+    a dict of pruned motion -> the motion that makes it redundant.
+    """
+
+    allowed = [m for m in motions.table if m in COST_TABLE]
+
+    # cheaply bucket the motions by a handful of angles first, so that only
+    # likely duplicates get compared across all 65536 angles
+    probes = range(0x0000, 0xFFFF + 1, 0x0401)
+    buckets = collections.defaultdict(list)
+    for motion in allowed:
+        function = motions.table[motion]
+        key = tuple(None if function(a) is None else function(a) & 0xFFFF for a in probes)
+        buckets[key].append(motion)
+
+    pruned = {}
+    for bucket in buckets.values():
+        if len(bucket) < 2:
+            continue
+
+        # on ties, keep whichever motion comes first in the motion table
+        full = {motion: transitions(motion) for motion in bucket}
+        for drop in reversed(bucket):
+            for keep in bucket:
+                if keep == drop or keep in pruned:
+                    continue
+                if full[keep] == full[drop] and dominates(keep, drop):
+                    pruned[drop] = keep
+                    break
+
+    return pruned
+
+
+def out_of_order(first, then):
+    """
+    Whether 'then' straight after 'first' is never worth searching: two
+    different pure rotations either undoing each other, or not in motion table
+    order.  Rotations can happen in any order and end up at the same angle, so
+    only searching one order removes duplicate paths.  This assumes COST_CHAINS
+    only discounts repeating the same rotation, as it does now.
+    """
+
+    if first is None or first == then:
+        return False
+
+    first_offset = motions.linear_offset(first)
+    then_offset = motions.linear_offset(then)
+    if first_offset is None or then_offset is None:
+        return False
+
+    if (first_offset + then_offset) & 0xFFFF == 0:
+        return True
+    return motions.ids[then] < motions.ids[first]
+
+
+# Cost tables are compiled once per (profile, allowed groups, costs) and cached,
+# since pruning dominated motions compares every motion's transitions.  The
+# costs are part of the key, so after editing BASIC_COSTS, COST_CHAINS or a
+# profile, initialize_cost_table() (or a setter) compiles a new table.
+COMPILED_COSTS = {}  # key -> (COST_TABLE, PRUNED_MOTIONS, EXPANSIONS, COST_MATRIX)
+
+# COST_TABLE flattened into a list, for lookups while navigating: the cost of
+# 'next' after 'last' is at 'cost_index(last, next)'; 'None' for disallowed
+# motions.  Row 0 is for no previous motion, row 'motions.ids[last] + 1' for
+# each motion.
+COST_MATRIX = []
+MOTION_COUNT = len(motions.names)
+
+
+def cost_index(last, next):
+    row = 0 if last is None else motions.ids[last] + 1
+    return row * MOTION_COUNT + motions.ids[next]
+
+
+def build_cost_table(profile_costs):
+    """
+    A cost table like COST_TABLE, for BASIC_COSTS with 'profile_costs' (e.g.
+    one of COST_PROFILES) on top, limited to the ALLOWED_GROUPS.
+    """
+
+    table = {None: BASIC_COSTS.copy()}
+    table[None].update(profile_costs)
+
+    for motion in table[None]:
+        table[motion] = table[None].copy()
     for (first, then), cost in COST_CHAINS.items():
-        COST_TABLE[first][then] = cost
+        table[first][then] = cost
 
-    all_motions = set(BASIC_COSTS.keys())
+    all_motions = set(table[None].keys())
     allowed_motions = {m for group in ALLOWED_GROUPS for m in MOVEMENT_OPTIONS[group]}
     disallowed_motions = all_motions - allowed_motions
 
     for motion in disallowed_motions:
-        del COST_TABLE[motion]
-    for first in COST_TABLE:
+        del table[motion]
+    for first in table:
         for motion in disallowed_motions:
-            del COST_TABLE[first][motion]
+            del table[first][motion]
+
+    return table
+
+
+def compile_cost_table():
+    COST_TABLE.clear()
+    COST_TABLE.update(build_cost_table(COST_PROFILES[COST_PROFILE]))
+
+    PRUNED_MOTIONS.clear()
+    if PRUNE_DOMINATED_MOTIONS:
+        PRUNED_MOTIONS.update(prune_dominated_motions())
+
+    EXPANSIONS.clear()
+    for first, row in COST_TABLE.items():
+        EXPANSIONS[first] = [(m, cost) for m, cost in row.items()
+                             if m not in PRUNED_MOTIONS and not out_of_order(first, m)]
+
+    COST_MATRIX[:] = [None] * ((MOTION_COUNT + 1) * MOTION_COUNT)
+    for first, row in COST_TABLE.items():
+        for then, cost in row.items():
+            COST_MATRIX[cost_index(first, then)] = cost
+
+
+def initialize_cost_table():
+    key = (COST_PROFILE, tuple(ALLOWED_GROUPS), PRUNE_DOMINATED_MOTIONS,
+           tuple(BASIC_COSTS.items()), tuple(COST_CHAINS.items()),
+           tuple(COST_PROFILES[COST_PROFILE].items()))
+
+    if key not in COMPILED_COSTS:
+        compile_cost_table()
+        COMPILED_COSTS[key] = (dict(COST_TABLE), dict(PRUNED_MOTIONS),
+                               dict(EXPANSIONS), list(COST_MATRIX))
+        return
+
+    (table, pruned, expansions, matrix) = COMPILED_COSTS[key]
+    COST_TABLE.clear()
+    COST_TABLE.update(table)
+    PRUNED_MOTIONS.clear()
+    PRUNED_MOTIONS.update(pruned)
+    EXPANSIONS.clear()
+    EXPANSIONS.update(expansions)
+    COST_MATRIX[:] = matrix
 
 
 ALLOWED_GROUPS = [
@@ -520,92 +2242,76 @@ ALLOWED_GROUPS = [
 initialize_cost_table()
 
 
-if __name__ == "__main__":
-    
-    ALLOWED_ANGLE_GROUPS = [
-        "cardinals",
-##        "downstairs",
-##        "downstairs climbable",
-##        "upstairs",
-##        "damage boost",
-##        "j0 targeting",
-##        "j1 targeting",
-##        "u0 targeting",
-##        "timestop",
-        "woods walls",
-        "woods tree",
-        ]
-
-    cardinals_dict = {
-        0x0000: "Southern wall (entrance to tunnel, observatory door)",
-        0x4000: "Eastern wall (tunnel, starpost by observatory door)",
-        0x8000: "Northern wall (double boxes, yellow stair flight, couch)",
-        0xc000: "Western wall (tunnel, starpost by observatory door)",
+cardinals_dict = {
+    0x0000: "Southern wall (entrance to tunnel, observatory door)",
+    0x4000: "Eastern wall (tunnel, starpost by observatory door)",
+    0x8000: "Northern wall (double boxes, yellow stair flight, couch)",
+    0xc000: "Western wall (tunnel, starpost by observatory door)",
 #        0x0a64: "Pot Drop Angle",
 #        0x00fb: "Right fin starting angle."
-        }
-        
-    downstairs_dict = {
-        0x54d1: "SW face of vase",
-        0x1526: "NW face of vase",
-        0xd4d1: "NE face of vase",
-        0x2aac: "SE downstairs wall",
-        0x5554: "NE downstairs wall (cyan stair flight)",
-        0xd563: "Cyan staircase railing",
-        0x9a42: "Bottom edge of railing",
-        0x5572: "Outside of stairs, front",
-        0x556b: "Outside of stairs, middle",
-        0x555b: "Outside of stairs, back",
-        0x673f: "Corner between crystal and vase",
-        0x794c: "Corner between vase and double boxes",
-        0xa9fe: "Corner between double boxes and stacked boxes",
-        0xabe3: "Stacked boxes",
-        0x6228: "Cucco feed",
-        0x8207: "Corner between Cucco feed and climbable box",
-        0xaab4: "Climbable box, climbable globe table",
-        0xea51: "Corner between climbable box and climbable globe table",
-        0x87ab: "Corner between climbable globe table and wall",
-        0xd554: "SW downstairs wall (clock)",
-        }
-    
-    downstairs_climbable_dict = {
-        0xaaac: "Wall behind climbable box",
-        0xaa95: "Wall behind climbable globe table",
-        0xeaa5: "Globe",
-        0xeb27: "Globe spin axis support",
-        }
-        
-    upstairs_dict = {
-        0xaa6f: "NW wall (red stair flight)",
-        0xaa68: "NW wall trim",
-        0xaa42: "NW wall trim corner ",
-        0xd57a: "SW wall trim corner",
-        0xd589: "SW wall trim (magenta stair flight)",
-        0xd5a7: "NE face of all starposts",
-        0x95a7: "SE face of starpost at top of stairs",
-        0xd535: "SW upstairs wall",
-        0x28c2: "SE upstairs wall",
-        0x554c: "NE upstairs wall",
-        0xaab4: "NW upstairs wall",
-        0xd52d: "Railing by couch",
-        0xff01: "N face of telescope platform",
-        0x14c9: "NW face of starposts",
-        0x9602: "SE face of starposts on telescope platform",
-        0xd581: "Telescope front side",
-        0x16ee: "Telescope right side",
-        0x6ab4: "Telescope back side",
-        0x93ae: "Telescope left side",
-        0xaa95: "SE face of telescope platform",
-        0x563e: "SW face of telescope platform",
-        0x564c: "Inner wall near top of magenta stairs",
-        0x56ca: "Inner wall near middle/bottom of magenta stairs",
-        0x2ac3: "Red staircase railing",
-        }
+}
+
+downstairs_dict = {
+    0x54d1: "SW face of vase",
+    0x1526: "NW face of vase",
+    0xd4d1: "NE face of vase",
+    0x2aac: "SE downstairs wall",
+    0x5554: "NE downstairs wall (cyan stair flight)",
+    0xd563: "Cyan staircase railing",
+    0x9a42: "Bottom edge of railing",
+    0x5572: "Outside of stairs, front",
+    0x556b: "Outside of stairs, middle",
+    0x555b: "Outside of stairs, back",
+    0x673f: "Corner between crystal and vase",
+    0x794c: "Corner between vase and double boxes",
+    0xa9fe: "Corner between double boxes and stacked boxes",
+    0xabe3: "Stacked boxes",
+    0x6228: "Cucco feed",
+    0x8207: "Corner between Cucco feed and climbable box",
+    0xaab4: "Climbable box, climbable globe table",
+    0xea51: "Corner between climbable box and climbable globe table",
+    0x87ab: "Corner between climbable globe table and wall",
+    0xd554: "SW downstairs wall (clock)",
+}
+
+downstairs_climbable_dict = {
+    0xaaac: "Wall behind climbable box",
+    0xaa95: "Wall behind climbable globe table",
+    0xeaa5: "Globe",
+    0xeb27: "Globe spin axis support",
+}
+
+upstairs_dict = {
+    0xaa6f: "NW wall (red stair flight)",
+    0xaa68: "NW wall trim",
+    0xaa42: "NW wall trim corner ",
+    0xd57a: "SW wall trim corner",
+    0xd589: "SW wall trim (magenta stair flight)",
+    0xd5a7: "NE face of all starposts",
+    0x95a7: "SE face of starpost at top of stairs",
+    0xd535: "SW upstairs wall",
+    0x28c2: "SE upstairs wall",
+    0x554c: "NE upstairs wall",
+    0xaab4: "NW upstairs wall",
+    0xd52d: "Railing by couch",
+    0xff01: "N face of telescope platform",
+    0x14c9: "NW face of starposts",
+    0x9602: "SE face of starposts on telescope platform",
+    0xd581: "Telescope front side",
+    0x16ee: "Telescope right side",
+    0x6ab4: "Telescope back side",
+    0x93ae: "Telescope left side",
+    0xaa95: "SE face of telescope platform",
+    0x563e: "SW face of telescope platform",
+    0x564c: "Inner wall near top of magenta stairs",
+    0x56ca: "Inner wall near middle/bottom of magenta stairs",
+    0x2ac3: "Red staircase railing",
+}
 
-    #The cost algorithm seems to have a hard time finding the best one when there's multiple initial angles,
-    #due to assuming that you should break up multiple ESS or C-Ups into separate steps, even going so far
-    #as to include reversing direction for no reason. As a workaround, only uncomment one at a time.
-    damage_boost_dict = {
+#The cost algorithm seems to have a hard time finding the best one when there's multiple initial angles,
+#due to assuming that you should break up multiple ESS or C-Ups into separate steps, even going so far
+#as to include reversing direction for no reason. As a workaround, only uncomment one at a time.
+damage_boost_dict = {
 ##	0x2bbc: "place bomb in corner by vase, crouchstab, slash",
 ##	0x40f4: "hold bomb after",
 ##	0x2d2c: "2 fast slashes",
@@ -759,81 +2465,167 @@ if __name__ == "__main__":
     0x1cac: "dry roll ? thrust ?",
     0x1a04: "several thrusts?",
     0x144c: "idk",
-        }
+}
 
-    j0_targeting_dict = {
+j0_targeting_dict = {
 ##        0xbd23: "J0 save context",
 ##        0x1b57: "J0 heap copy of playing file",
-        0x2ca3: "J0 heap copy of created file",
-        }
+    0x2ca3: "J0 heap copy of created file",
+}
 
-    j1_targeting_dict = {
+j1_targeting_dict = {
 ##        0xbdcf: "J1 save context",
 ##        0x1c07: "J1 heap copy of playing file",
-        0x2d53: "J1 heap copy of created file",
-        }
+    0x2d53: "J1 heap copy of created file",
+}
 
-    u0_targeting_dict = {
-        0xbda7: "U0 save context",
-        #0x1af3: "U0 heap copy of playing file",
-        }
+u0_targeting_dict = {
+    0xbda7: "U0 save context",
+    #0x1af3: "U0 heap copy of playing file",
+}
 
-    timestop_dict = {
-        0x3ddf: "Tap up (with 3DDF timestop angle)",
-        0x7ddf: "Tap left (with 3DDF timestop angle)",
-        0xbddf: "Tap down (with 3DDF timestop angle)",
-        0xfddf: "Tap right (with 3DDF timestop angle)",
-        }
+timestop_dict = {
+    0x3ddf: "Tap up (with 3DDF timestop angle)",
+    0x7ddf: "Tap left (with 3DDF timestop angle)",
+    0xbddf: "Tap down (with 3DDF timestop angle)",
+    0xfddf: "Tap right (with 3DDF timestop angle)",
+}
 
-    woods_walls_dict = {
-        0x1e0b: "Southeast corner, wall 1/4 from Eastern tunnel.",
-        0x2bdb: "Southeast corner, wall 2/4 from Eastern tunnel.",
-        0x1425: "Southeast corner, wall 3/4 from Eastern tunnel.",
-        0x21f5: "Southeast corner, wall 4/4 from Eastern tunnel.",
-        0xe7e5: "Southwest corner, wall 1/4 from Southern tunnel.",
-        0xea8e: "Southwest corner, wall 2/4 from Southern tunnel.",
-        0xd572: "Southwest corner, wall 3/4 from Southern tunnel.",
-        0xd81b: "Southwest corner, wall 4/4 from Southern tunnel.",
-        0x9e0b: "Northwest corner, wall 1/4 from Western tunnel.",
-        0xabdb: "Northwest corner, wall 2/4 from Western tunnel.",
-        0x9425: "Northwest corner, wall 3/4 from Western tunnel.",
-        0xa1f5: "Northwest corner, wall 4/4 from Western tunnel.",
-        0x67e5: "Northeast corner, wall 1/4 from Northern tunnel.",
-        0x6a8e: "Northeast corner, wall 2/4 from Northern tunnel.",
-        0x5572: "Northeast corner, wall 3/4 from Northern tunnel.",
-        0x581b: "Northeast corner, wall 4/4 from Northern tunnel.",
-        }
-    
-    woods_tree_dict = {
-        0xe39c: "Eastern corner, far root.",
-        0xc3b1: "Eastern corner, tree trunk.",
-        0xb216: "Eastern corner, close root.",
-        0xef66: "Northern corner, Eastern trunk.",
-        0xff3e: "Northern corner, Western trunk.",
-        0x4ed4: "Western corner, Northern root.",
-        0x39f5: "Western corner, tree trunk.",
-        0x2f10: "Western corner, Southern root.",
-        0x7d6b: "Eastern corner, close root.",
-        0x6acb: "Eastern corner, close tree trunk.",
-        0x85a7: "Eastern corner, middle tree trunk.",
-        0x8d99: "Eastern corner, far tree trunk.",
-        0x8374: "Eastern corner, far root.",
-        }
+woods_walls_dict = {
+    0x1e0b: "Southeast corner, wall 1/4 from Eastern tunnel.",
+    0x2bdb: "Southeast corner, wall 2/4 from Eastern tunnel.",
+    0x1425: "Southeast corner, wall 3/4 from Eastern tunnel.",
+    0x21f5: "Southeast corner, wall 4/4 from Eastern tunnel.",
+    0xe7e5: "Southwest corner, wall 1/4 from Southern tunnel.",
+    0xea8e: "Southwest corner, wall 2/4 from Southern tunnel.",
+    0xd572: "Southwest corner, wall 3/4 from Southern tunnel.",
+    0xd81b: "Southwest corner, wall 4/4 from Southern tunnel.",
+    0x9e0b: "Northwest corner, wall 1/4 from Western tunnel.",
+    0xabdb: "Northwest corner, wall 2/4 from Western tunnel.",
+    0x9425: "Northwest corner, wall 3/4 from Western tunnel.",
+    0xa1f5: "Northwest corner, wall 4/4 from Western tunnel.",
+    0x67e5: "Northeast corner, wall 1/4 from Northern tunnel.",
+    0x6a8e: "Northeast corner, wall 2/4 from Northern tunnel.",
+    0x5572: "Northeast corner, wall 3/4 from Northern tunnel.",
+    0x581b: "Northeast corner, wall 4/4 from Northern tunnel.",
+}
+
+woods_tree_dict = {
+    0xe39c: "Eastern corner, far root.",
+    0xc3b1: "Eastern corner, tree trunk.",
+    0xb216: "Eastern corner, close root.",
+    0xef66: "Northern corner, Eastern trunk.",
+    0xff3e: "Northern corner, Western trunk.",
+    0x4ed4: "Western corner, Northern root.",
+    0x39f5: "Western corner, tree trunk.",
+    0x2f10: "Western corner, Southern root.",
+    0x7d6b: "Eastern corner, close root.",
+    0x6acb: "Eastern corner, close tree trunk.",
+    0x85a7: "Eastern corner, middle tree trunk.",
+    0x8d99: "Eastern corner, far tree trunk.",
+    0x8374: "Eastern corner, far root.",
+}
+
+starting_angles_switcher = {
+    "cardinals": cardinals_dict,
+    "downstairs": downstairs_dict,
+    "downstairs climbable": downstairs_climbable_dict,
+    "upstairs": upstairs_dict,
+    "damage boost": damage_boost_dict,
+    "j0 targeting": j0_targeting_dict,
+    "j1 targeting": j1_targeting_dict,
+    "u0 targeting": u0_targeting_dict,
+    "timestop": timestop_dict,
+    "woods walls": woods_walls_dict,
+    "woods tree": woods_tree_dict,
+}
+
+
+# Link's instance address for each version, which the stale reference drop
+# angles are based on.
+LINK_ADDRS = {
+    "JP 1.0": 0x3fffa0,
+    "JP 1.1": 0x400260,
+    "US": 0x3ffdb0,
+}
+
+
+def stale_reference_drop_targets(version):
+    """Stale reference drop angles (at most 12 words prior to Link + 0xAD4)."""
+    link_addr = LINK_ADDRS[version]
+    combo_angle = (link_addr + 0xAD4) % 0x10000
+    earliest = (link_addr + 0xAD4 - 12*4) % 0x10000
+    return angle_range(earliest, combo_angle, 4)
+
+
+def set_allowed_groups(groups):
+    """Switch to a different list of MOVEMENT_OPTIONS groups."""
+    ALLOWED_GROUPS[:] = groups
+    initialize_cost_table()
+
+
+def select_cost_profile(profile):
+    """Switch to a different one of COST_PROFILES."""
+    global COST_PROFILE
+    if profile not in COST_PROFILES:
+        raise ValueError(f"unknown cost profile \"{profile}\"")
+    COST_PROFILE = profile
+    initialize_cost_table()
+
+
+# find_paths() queries with their own cost profile take turns, since the
+# profile is switched through the module's cost tables for the query.
+profile_lock = threading.Lock()
+
+
+def find_paths(starting_angles, targets, sample_size=20, number=10, profile=None):
+    """
+    Search from the starting angles and collect the cheapest paths to any of
+    the targets, using a cached offset graph when every motion is a pure
+    rotation.  If 'profile' is given, this query uses that cost profile, and
+    the current one is selected again afterwards.
+    """
+
+    if profile is None or profile == COST_PROFILE:
+        return search_paths(starting_angles, targets, sample_size, number)
+
+    with profile_lock:
+        previous = COST_PROFILE
+        select_cost_profile(profile)
+        try:
+            return search_paths(starting_angles, targets, sample_size, number)
+        finally:
+            select_cost_profile(previous)
+
+
+def search_paths(starting_angles, targets, sample_size, number):
+    """find_paths() with the current cost profile."""
+
+    if is_linear():
+        graph = explore_linear()
+        return collect_linear_paths(graph, starting_angles, targets, sample_size, number)
+
+    bound = linear_upper_bound(starting_angles, targets)
+    graph = explore(starting_angles, targets=targets, bound=bound)
+    return collect_target_paths(graph, targets, sample_size, number)
+
+
+if __name__ == "__main__":
     
-    starting_angles_switcher = {
-        "cardinals": cardinals_dict,
-        "downstairs": downstairs_dict,
-        "downstairs climbable": downstairs_climbable_dict,
-        "upstairs": upstairs_dict,
-        "damage boost": damage_boost_dict,
-        "j0 targeting": j0_targeting_dict,
-        "j1 targeting": j1_targeting_dict,
-        "u0 targeting": u0_targeting_dict,
-        "timestop": timestop_dict,
-        "woods walls": woods_walls_dict,
-        "woods tree": woods_tree_dict,
-        }
-        
+    ALLOWED_ANGLE_GROUPS = [
+        "cardinals",
+##        "downstairs",
+##        "downstairs climbable",
+##        "upstairs",
+##        "damage boost",
+##        "j0 targeting",
+##        "j1 targeting",
+##        "u0 targeting",
+##        "timestop",
+        "woods walls",
+        "woods tree",
+        ]
+
     starting_angles_dict = {
         }
 
@@ -841,77 +2633,81 @@ if __name__ == "__main__":
         starting_angles_dict.update(starting_angles_switcher[angle_group])
     
     starting_angles=list(starting_angles_dict)
+
+    # To weigh setups that take longer, give starting angles an initial cost
+    # instead, e.g.:
+    #starting_angles = {0x2280: 0, 0x4000: 1.5}
+
+    for pruned, kept in PRUNED_MOTIONS.items():
+        print(f"Not expanding \"{pruned}\", \"{kept}\" does the same for less")
     
-    # Create a graph starting at the given angles.
-    graph = explore(starting_angles)
-    paths = []
 
 
 
 
-    # Uncomment one of the link_addr lines based on your desired version.
-    #link_addr=0x3fffa0 #JP 1.0 
-    link_addr=0x400260 #JP 1.1
-    #link_addr=0x3ffdb0 #US
+    # Uncomment one of the versions (see LINK_ADDRS).
+    #version = "JP 1.0"
+    version = "JP 1.1"
+    #version = "US"
 
-    # Stale reference drop angles (at most 12 words prior to Link + 0xAD4)
-    combo_angle = (link_addr + 0xAD4) % 0x10000
-    earliest = (link_addr + 0xAD4 - 12*4) % 0x10000
+    # Uncomment one of the cost profiles (see COST_PROFILES).
+    #profile = "mask transition"
+    profile = "collision angle"
 
 
 
-    # DESIRED ANGLES - Uncomment only one "for" statement.
+    # DESIRED ANGLES - Uncomment only one "targets" statement.
 
 
 
     # Stale Reference Drop Angle (all versions)
-    for angle in list(range(earliest, combo_angle+1, 4)):
+    targets = stale_reference_drop_targets(version)
 
 
 
     # JP 1.0 TARGETING ANGLES
     # Targeting angle (save context)[playing file]
-    #for angle in [0xBD23]:
+    #targets = AngleSet([0xBD23])
 
     # Targeting angle (heap copy)[playing file]
-    #for angle in [0x1B57]:
+    #targets = AngleSet([0x1B57])
 
     # Targeting angle (heap copy)[created file]
-    #for angle in [0x2CA3]:
+    #targets = AngleSet([0x2CA3])
 
     # All targeting angles
-    #for angle in [0xBD23,0x1B57,0x2CA3]:
+    #targets = AngleSet([0xBD23,0x1B57,0x2CA3])
 
 
 
     # JP 1.1 TARGETING ANGLES
     # Targeting angle (save context)[playing file]
-    #for angle in [0xBDCF]:
+    #targets = AngleSet([0xBDCF])
 
     # Targeting angle (heap copy)[playing file]
-    #for angle in [0x1C07]:
+    #targets = AngleSet([0x1C07])
 
     # Targeting angle (heap copy)[created file]
-    #for angle in [0x2D53]:
+    #targets = AngleSet([0x2D53])
 
     # All targeting angles
-    #for angle in [0xBDCF,0x1C07,0x2D53]:
+    #targets = AngleSet([0xBDCF,0x1C07,0x2D53])
 
 
 
     # US 1.0 TARGETING ANGLES
     # Targeting angle (save context)[playing file]
-    #for angle in [0xBDA7]:
+    #targets = AngleSet([0xBDA7])
 
     # Targeting angle (heap copy)[playing file]
-    #for angle in [0x1AF3]:
+    #targets = AngleSet([0x1AF3])
 
     # We cannot jump to the playing file via a filename in the US charset.
     # Thus, in order to use both files, we can only consider
     # angle setups that send us to the playing file.
 
     # All targeting angles
-    #for angle in [0xBDA7,0x1AF3]:
+    #targets = AngleSet([0xBDA7,0x1AF3])
 
 
 
@@ -919,24 +2715,24 @@ if __name__ == "__main__":
 
     # FACING ANGLES (same for all versions)
     # Facing angle (save context)
-    #for angle in [0x0807]:
+    #targets = AngleSet([0x0807])
 
     # Facing angle (heap copy)
-    #for angle in [0x0814]:
+    #targets = AngleSet([0x0814])
 
     # All facing angles
-    #for angle in [0x0807, 0x0814]:
+    #targets = AngleSet([0x0807, 0x0814])
 
 
     #JP 1.0 Moonwarp Vertical Angles
-    #for angle in [0x0810, 0x0814]:
+    #targets = AngleSet([0x0810, 0x0814])
 
     #JP 1.0 Moonwarp Horizontal Angles
-    #for angle in [0x3BB1, 0x3BB2, 0x3AEE, 0x3AEF]:#, 0x2CA3]:
-    #for angle in [0x5CA1, 0x5CA2, 0x5BDE, 0x5BDF]:
-    #for angle in [0x5CA1-0x190, 0x5CA1+0x190, 0x5CA2-0x190, 0x5CA2+0x190]:#, 0x5BDE-0x190, 0x5BDE+0x190, 0x5BDF-0x190, 0x5BDF+0x190]:
-    #for angle in [0xFB, 0xFC, 0xA4, 0xA5]:
-    #for angle in [0x5b11]:
+    #targets = AngleSet([0x3BB1, 0x3BB2, 0x3AEE, 0x3AEF])#, 0x2CA3]
+    #targets = AngleSet([0x5CA1, 0x5CA2, 0x5BDE, 0x5BDF])
+    #targets = AngleSet([0x5CA1-0x190, 0x5CA1+0x190, 0x5CA2-0x190, 0x5CA2+0x190])#, 0x5BDE-0x190, 0x5BDE+0x190, 0x5BDF-0x190, 0x5BDF+0x190]
+    #targets = AngleSet([0xFB, 0xFC, 0xA4, 0xA5])
+    #targets = AngleSet([0x5b11])
 
 
 
@@ -945,190 +2741,48 @@ if __name__ == "__main__":
 
 
     # US 1.0 FD MASK ANGLES
-    #for angle in [0xFF85, 0x007B, 0x066A, 0x066C, 0x0E0C]:
+    #targets = AngleSet([0xFF85, 0x007B, 0x066A, 0x066C, 0x0E0C])
 
 
 
 
     # CHEST SRM COLLISION ANGLE SHENANIGANS
-    #(very long because it's a bit hacked in)
     #[You're on your own for figuring out which wall to collide with atm,
     # just know it's possible. It will be off by a multiple of 0x4000 from
     # the desired angle.]
 
 
-    #Flags (avoiding blue rupees)
-
-    #All flags
-##    flags = list(range(0, 0xFF+1, 1))
-##
-##    # Uncomment only one line based on your use case for the desired item.
-##    #safe_flags = [ 0xBF & flag for flag in flags] # Empty slot
-##    safe_flags = [ 0xDF & flag for flag in flags] # Full slot
-##    #safe_flags = [ 0x9F & flag for flag in flags] # Always safe, but fewer results.
-##
-##    # Remove duplicates.
-##    safe_flags = list( dict.fromkeys(safe_flags) )
-##
-##
-##    #The working values for various items.
-##    ocarina = [0x0000 + flag for flag in safe_flags]
-##    bow = [0x0100 + flag for flag in safe_flags]
-##    fire_arrow = [0x0200 + flag for flag in safe_flags]
-##    ice_arrow = [0x0300 + flag for flag in safe_flags]
-##    light_arrow = [0x0400 + flag for flag in safe_flags]
-##    fairy_ocarina_oot = [0x0500 + flag for flag in safe_flags]
-##    bomb = [0x0600 + flag for flag in safe_flags] #only gives 1 if you already have bomb bag
-##    bombchus = [0x0700 + flag for flag in safe_flags]
-##    stick = [0x0800 + flag for flag in safe_flags]
-##    nut = [0x0900 + flag for flag in safe_flags]
-##    bean = [0x0a00 + flag for flag in safe_flags]
-##    fairy_slingshot_oot = [0x0b00 + flag for flag in safe_flags]
-##    keg = [0x0c00 + flag for flag in safe_flags]
-##    pictobox = [0x0d00 + flag for flag in safe_flags]
-##    lens = [0x0e00 + flag for flag in safe_flags]
-##    hookshot = [0x0f00 + flag for flag in safe_flags]
-##    gf_sword = [0x1000 + flag for flag in safe_flags]
-##    longshot_oot = [0x1100 + flag for flag in safe_flags]
-##    bottle = [0x1200 + flag for flag in safe_flags]
-##    red_potion = [0x1300 + flag for flag in safe_flags]
-##    green_potion = [0x1400 + flag for flag in safe_flags]
-##    blue_potion = [0x1500 + flag for flag in safe_flags]
-##    fairy = [0x1600 + flag for flag in safe_flags]
-##    deku_princess = [0x1700 + flag for flag in safe_flags]
-##    milk = [0x1800 + flag for flag in safe_flags]
-##    half_milk = [0x1900 + flag for flag in safe_flags]
-##    fish = [0x1a00 + flag for flag in safe_flags]
-##    bug = [0x1b00 + flag for flag in safe_flags]
-##    blue_fire_oot = [0x1c00 + flag for flag in safe_flags]
-##    poe = [0x1d00 + flag for flag in safe_flags]
-##    big_poe = [0x1e00 + flag for flag in safe_flags]
-##    spring_water = [0x1f00 + flag for flag in safe_flags]
-##    hot_spring_water = [0x2000 + flag for flag in safe_flags]
-##    zora_egg = [0x2100 + flag for flag in safe_flags]
-##    gold_dust = [0x2200 + flag for flag in safe_flags]
-##    magic_mushroom = [0x2300 + flag for flag in safe_flags]
-##    sea_horse = [0x2400 + flag for flag in safe_flags]
-##    chateau_romani = [0x2500 + flag for flag in safe_flags]
-##    hylian_loach_beta = [0x2600 + flag for flag in safe_flags]
-##    obabas_drink_beta = [0x2700 + flag for flag in safe_flags]
-##    moons_tear = [0x2800 + flag for flag in safe_flags]
-##    land_title_deed = [0x2900 + flag for flag in safe_flags]
-##    swamp_title_deed = [0x2a00 + flag for flag in safe_flags]
-##    mountain_title_deed = [0x2b00 + flag for flag in safe_flags]
-##    ocean_title_deed = [0x2c00 + flag for flag in safe_flags]
-##    room_key = [0x2d00 + flag for flag in safe_flags]
-##    expressmail = [0x2e00 + flag for flag in safe_flags]
-##    letter = [0x2f00 + flag for flag in safe_flags]
-##    pendant = [0x3000 + flag for flag in safe_flags]
-##    tingles_map = [0x3100 + flag for flag in safe_flags]
-##    deku_mask = [0x3200 + flag for flag in safe_flags]
-##    goron_mask = [0x3300 + flag for flag in safe_flags]
-##    zora_mask = [0x3400 + flag for flag in safe_flags]
-##    fd_mask = [0x3500 + flag for flag in safe_flags]
-##    mask_of_truth = [0x3600 + flag for flag in safe_flags]
-##    kafeis_mask = [0x3700 + flag for flag in safe_flags]
-##    all_night_mask = [0x3800 + flag for flag in safe_flags]
-##    bunny_hood = [0x3900 + flag for flag in safe_flags]
-##    keaton_mask = [0x3a00 + flag for flag in safe_flags]
-##    garos_mask = [0x3b00 + flag for flag in safe_flags]
-##    romanis_mask = [0x3c00 + flag for flag in safe_flags]
-##    circus_leaders_mask = [0x3d00 + flag for flag in safe_flags]
-##    postmans_hat = [0x3e00 + flag for flag in safe_flags]
-##    couples_mask = [0x3f00 + flag for flag in safe_flags]
-##    gf_mask = [0x4000 + flag for flag in safe_flags]
-##    gibdo_mask = [0x4100 + flag for flag in safe_flags]
-##    don_geros_mask = [0x4200 + flag for flag in safe_flags]
-##    kamaros_mask = [0x4300 + flag for flag in safe_flags]
-##    captains_hat = [0x4400 + flag for flag in safe_flags]
-##    stone_mask = [0x4500 + flag for flag in safe_flags]
-##    bremen_mask = [0x4600 + flag for flag in safe_flags]
-##    blast_mask = [0x4700 + flag for flag in safe_flags]
-##    mask_of_scents = [0x4800 + flag for flag in safe_flags]
-##    giants_mask = [0x4900 + flag for flag in safe_flags]
-##    fire_bow = [0x4a00 + flag for flag in safe_flags]
-##    ice_bow = [0x4b00 + flag for flag in safe_flags]
-##    light_bow = [0x4c00 + flag for flag in safe_flags]
-##    kokiri_sword = [0x4d00 + flag for flag in safe_flags]
-##    razor_sword = [0x4e00 + flag for flag in safe_flags]
-##    gilded_sword = [0x4f00 + flag for flag in safe_flags]
-##    fd_sword = [0x5000 + flag for flag in safe_flags]
-##    heros_shield = [0x5100 + flag for flag in safe_flags]
-##    mirror_shield = [0x5200 + flag for flag in safe_flags]
-##    quiver = [0x5300 + flag for flag in safe_flags]
-##    large_quiver = [0x5400 + flag for flag in safe_flags]
-##    largest_quiver = [0x5500 + flag for flag in safe_flags]
-##    bomb_bag = [0x5600 + flag for flag in safe_flags]
-##    big_bomb_bag = [0x5700 + flag for flag in safe_flags]
-##    biggest_bomb_bag = [0x5800 + flag for flag in safe_flags]
-##    child_wallet_beta = [0x5900 + flag for flag in safe_flags]
-##    adult_wallet = [0x5a00 + flag for flag in safe_flags]
-##    giant_wallet = [0x5b00 + flag for flag in safe_flags]
-##    fishing_rod_oot = [0x5c00 + flag for flag in safe_flags]
-##    odolwas_remains = [0x5d00 + flag for flag in safe_flags]
-##    gohts_remains = [0x5e00 + flag for flag in safe_flags]
-##    gyorgs_remains = [0x5f00 + flag for flag in safe_flags]
-##    twinmolds_remains = [0x6000 + flag for flag in safe_flags]
-##    sonata = [0x6100 + flag for flag in safe_flags]
-##    lullaby = [0x6200 + flag for flag in safe_flags]
-##    nwbn = [0x6300 + flag for flag in safe_flags]
-##    elegy = [0x6400 + flag for flag in safe_flags]
-##    oath = [0x6500 + flag for flag in safe_flags]
-##    sarias_song = [0x6600 + flag for flag in safe_flags]
-##    song_of_time = [0x6700 + flag for flag in safe_flags]
-##    song_of_healing = [0x6800 + flag for flag in safe_flags]
-##    eponas_song = [0x6900 + flag for flag in safe_flags]
-##    song_of_soaring = [0x6a00 + flag for flag in safe_flags]
-##    song_of_storms = [0x6b00 + flag for flag in safe_flags]
-##    suns_song = [0x6c00 + flag for flag in safe_flags]
-##    bombers_notebook = [0x6d00 + flag for flag in safe_flags]
-##    gold_skulltula_token = [0x6e00 + flag for flag in safe_flags]
-##    heart_container = [0x6f00 + flag for flag in safe_flags]
-##    piece_of_heart = [0x700 + flag for flag in safe_flags]
-##    x40_bit_1ef72d = [0x7100 + flag for flag in safe_flags]
-##    x50_bit_1ef72d = [0x7200 + flag for flag in safe_flags]
-##    lullaby_intro = [0x7300 + flag for flag in safe_flags]
-##    boss_key = [0x7400 + flag for flag in safe_flags]
-##    compass = [0x7500 + flag for flag in safe_flags]
-##    dungeon_map = [0x7600 + flag for flag in safe_flags]
-##    stray_fairy = [0x7700 + flag for flag in safe_flags]
-##    small_key = [0x7800 + flag for flag in safe_flags]
-##    magic_jar = [0x7900 + flag for flag in safe_flags]
-##    magic_jar_2 = [0x7a00 + flag for flag in safe_flags]
-##    piece_of_heart_2 = [0x7b00 + flag for flag in safe_flags]
-##    glitched_ocarina_slot = [0x7c00 + flag for flag in safe_flags]
-##    glitched_third_bottle_slot = [0x7d00 + flag for flag in safe_flags]
-##    glitched_ocarina_slot_2 = [0x7e00 + flag for flag in safe_flags]
-##    glitched_ocarina_slot_3 = [0x7f00 + flag for flag in safe_flags]
-##    glitched_ocarina_slot_4 = [0x8000 + flag for flag in safe_flags]
-##    
-##
-##    # Desired collision angles. SET THIS TO ANY OF THE ABOVE ITEMS YOU WANT.
-##    cangs = song_of_soaring
-##
-##
-##    # Walls available to collide with.    
-##    walls = list(cardinals_dict)
-##
-##
-##    # Convert the list of working collision angles into movement angles, since
-##    # this script is designed to find *movement* angle setups.
-##    movement_angles=[]
-##    for wall in walls:
-##        movement_angles.extend([(abs(wall+cang) % 0x8000) for cang in cangs])
-##        
-##    # Remove duplicates.
-##    movement_angles = list( dict.fromkeys(movement_angles) )
-##
-##
-##    #Movement angles for US 1.0 Collision angles.  COMMENT THIS LINE IF NOT LOOKING FOR COLLISION ANGLE.
-##    for angle in movement_angles:
+    # Walls available to collide with, the desired item (see COLLISION_ITEMS)
+    # and the state of its slot (see FLAG_MASKS).  COMMENT THIS LINE IF NOT
+    # LOOKING FOR COLLISION ANGLE.
+##    targets = collision_targets(list(cardinals_dict), "song of soaring", "full slot")
     
 
     
-    # Collect the 5 fastest sequences of the first 50 visited.  The fastest
+    # Search from the given angles, stopping once the targets are settled.
+    #
+    # Collect the 6 fastest sequences of the first 1000 visited.  The fastest
     # sequence collected is at least tied as the fastest sequence overall.
-        paths.extend(collect_paths(graph, angle, sample_size=1000, number=6))
+    # (skipped if the targets can't be reached with the allowed motions at all)
+    if is_reachable(starting_angles, targets):
+        paths = find_paths(starting_angles, targets, sample_size=1000, number=6, profile=profile)
+    else:
+        paths = []
+
+    # Or, to rank the starting angles instead (the cheapest path from each
+    # one, from a single search backwards from the targets), uncomment:
+    #paths = rank_starting_angles(starting_angles, targets)
+
+    # Or, for the best path for each trade-off between time, number of inputs
+    # and camera motions (see pareto_paths), uncomment:
+    #paths = [(cost, angle, path) for cost, _, _, angle, path in pareto_paths(starting_angles, targets)]
+
+    # Or, for the cheapest path within some limits (see constrained_paths),
+    # e.g. at most 3 c-ups, no first person items and ending with a turn:
+    #paths = constrained_paths(starting_angles, targets, max_counts={"c-up": 3},
+    #                          forbidden=["first person item horizontal", "first person item vertical"],
+    #                          end_with=["turn left", "turn right", "turn 180"])
+
     # Results seem to be better with an unlimited sample_size, but everything after the 6th
     # result is invalid with a COST_FLEX of 8. Any higher COST_FLEX increases processing time
     # dramatically, so we have to limit the number of results to 6. It still seems to miss some
@@ -1139,8 +2793,6 @@ if __name__ == "__main__":
     # something like 100 results times whatever we set "number" to so I'm just
     # setting it to 1 to try to limit things a bit.
 
-    paths.sort()
-
     for cost, angle, path in paths:
         print(f"cost: {cost}\n-----")
         try:
@@ -1152,4 +2804,10 @@ if __name__ == "__main__":
 
     if len(paths) == 0:
         print("No way to get to the desired angle!")
-        print("Add some more motions.")
+        groups = enabling_groups(starting_angles, targets)
+        if groups:
+            print("Allowing any one of these would make it reachable:")
+            for group in groups:
+                print(f"    {group}")
+        else:
+            print("Add some more motions.")
@@ -1,4 +1,7 @@
+from array import array
+from bisect import bisect_right
 import gzip
+import threading
 
 # generally just ess up, but also considered adjusting
 # the camera when turning left / right / 180
@@ -50,30 +53,98 @@ def ess_up_adjust_noncached(angle):
         index += 1
 
 
-CAMERA_SNAPS = []
-
-try:
-    with gzip.open("camera_snaps.txt.gz", "rt") as cam:
-        for line in cam:
-            if line.strip() == "False":
-                CAMERA_SNAPS.append(False)
-            else:
-                CAMERA_SNAPS.append(int(line))
-except:
-    camera_angles = []
-    with open("camera_favored.txt", "r") as f:
-        for line in f:
-            camera_angles.append(int(line.strip(), 16))
-
-    for angle in range(0xFFFF + 1):
-        if (angle % 0x1000) == 0:
-            print(f"Caching camera movements ({hex(angle)})...", end="\r")
-        CAMERA_SNAPS.append(ess_up_adjust_noncached(angle))
-    print("\nDone.")
-
-    with gzip.open("camera_snaps.txt.gz", "wt") as cam:
-        for angle in CAMERA_SNAPS:
-            print(angle, file=cam)
+# The camera snaps are loaded on first use rather than on import, since most
+# searches (ess left/right, c-ups, ...) never touch the camera.
+#
+# Snapping is constant over long ranges of angles (e.g. 0xBE7F-0xBEBE all
+# snap to 0xBEC1), so it's kept run-length encoded: the angles in
+# 'SNAP_STARTS[i]' up to the next start all snap to 'SNAP_VALUES[i]', where -1
+# stands for False (no snap).  About 4000 runs instead of 65536 entries, in
+# arrays of 2-byte starts and 4-byte values (about 24 KB).
+SNAP_STARTS = None
+SNAP_VALUES = None
+camera_lock = threading.Lock()
+
+# Motions whose result only depends on where the camera snaps to, so that every
+# angle snapping to the same value ends up in the same place.
+CAMERA_MOTIONS = {"ess up", "turn left", "turn right", "turn 180", "mask transition"}
+
+
+def load_camera_snaps():
+    """
+    Load the cached camera snaps, building and caching them first if needed.
+    Safe to call from several threads; only one of them does the work.
+    """
+
+    global SNAP_STARTS, SNAP_VALUES, camera_angles
+
+    with camera_lock:
+        if SNAP_STARTS is not None:
+            # another thread got here first
+            return SNAP_STARTS, SNAP_VALUES
+
+        snaps = []
+
+        try:
+            with gzip.open("camera_snaps.txt.gz", "rt") as cam:
+                for line in cam:
+                    if line.strip() == "False":
+                        snaps.append(False)
+                    else:
+                        snaps.append(int(line))
+            if len(snaps) != 0xFFFF + 1:
+                raise ValueError("truncated camera cache")
+        except (OSError, EOFError, ValueError):
+            camera_angles = []
+            with open("camera_favored.txt", "r") as f:
+                for line in f:
+                    camera_angles.append(int(line.strip(), 16))
+
+            snaps = []
+            for angle in range(0xFFFF + 1):
+                if (angle % 0x1000) == 0:
+                    print(f"Caching camera movements ({hex(angle)})...", end="\r")
+                snaps.append(ess_up_adjust_noncached(angle))
+            print("\nDone.")
+
+            with gzip.open("camera_snaps.txt.gz", "wt") as cam:
+                for angle in snaps:
+                    print(angle, file=cam)
+
+        starts = array("H")
+        values = array("i")
+        for angle, snap in enumerate(snaps):
+            value = -1 if snap is False else snap
+            if not values or values[-1] != value:
+                starts.append(angle)
+                values.append(value)
+
+        SNAP_VALUES = values
+        SNAP_STARTS = starts  # set last; other threads check it
+
+    return SNAP_STARTS, SNAP_VALUES
+
+
+def snap_classes():
+    """
+    Dict of snap value -> list of '(first, last)' angle ranges (inclusive)
+    that snap to it; None for angles that don't snap.
+    """
+
+    (starts, values) = load_camera_snaps()
+    classes = {}
+    for i, value in enumerate(values):
+        last = starts[i + 1] - 1 if i + 1 < len(starts) else 0xFFFF
+        classes.setdefault(None if value < 0 else value, []).append((starts[i], last))
+    return classes
+
+
+def snap_class(angle):
+    """Value shared by every angle that snaps to the same place (-1 if none)."""
+    starts = SNAP_STARTS
+    if starts is None:
+        starts, _ = load_camera_snaps()
+    return SNAP_VALUES[bisect_right(starts, angle) - 1]
 
 
 # basic movement options
@@ -89,7 +160,11 @@ def ess_right(angle):
 # cardinal turns (gc/vc only)
 
 def ess_up_adjust(angle):
-    return CAMERA_SNAPS[angle]
+    starts = SNAP_STARTS
+    if starts is None:
+        starts, _ = load_camera_snaps()
+    value = SNAP_VALUES[bisect_right(starts, angle) - 1]
+    return False if value < 0 else value
 
 def turn_left(angle):
     angle = ess_up_adjust(angle)  # camera auto adjusts similar to ess up
@@ -316,3 +391,39 @@ table = {
     "goron tap sidehop left": goron_tap_sidehop_left,
     "goron tap sidehop right": goron_tap_sidehop_right,
 }
+
+
+# Motions can also be referred to by their position in the table.
+names = list(table)
+ids = {name: id for id, name in enumerate(names)}
+
+
+# Most motions are pure rotations ("angle + constant"); only the camera snaps
+# and first person clamps depend on where you start.  Searches over rotations
+# alone look the same from every starting angle.
+linear_offsets = {}
+
+
+def linear_offset(name):
+    """
+    The constant that a motion rotates every angle by, or None if the motion
+    depends on the angle it starts from.
+    """
+
+    if name not in linear_offsets:
+        function = table[name]
+        offset = None
+
+        first = function(0x0000)
+        if first is not None and first is not False:
+            offset = first & 0xFFFF
+            for angle in range(0xFFFF + 1):
+                new_angle = function(angle)
+                if new_angle is None or new_angle is False or (new_angle - angle) & 0xFFFF != offset:
+                    offset = None
+                    break
+
+        linear_offsets[name] = offset
+
+    return linear_offsets[name]
+
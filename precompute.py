@@ -0,0 +1,111 @@
+import sqlite3
+import sys
+from decimal import Decimal
+
+import angle_finder
+
+
+# PRECOMPUTED STALE REFERENCE DROP PATHS
+#
+# The stale reference drop angles only depend on the version, so the best
+# paths from every room in 'starting_angles_switcher' can be found once, for
+# each version and a few common motion configurations, and stored in an
+# SQLite database.  Looking them up afterwards is a single indexed read.
+#
+#    python precompute.py                             --- rebuild everything
+#    python precompute.py "woods tree" "JP 1.1" basic --- look up one result
+
+DATABASE = "stale_reference_drop.db"
+
+MOTION_CONFIGS = {
+    "basic": [
+        "basic",
+    ],
+    "c-up": [
+        "basic",
+        "c-up",
+    ],
+    "cardinals": [
+        "basic",
+        "target & cardinals available",
+    ],
+    "cardinals, c-up": [
+        "basic",
+        "target & cardinals available",
+        "c-up",
+    ],
+}
+
+
+def connect(database=DATABASE):
+    connection = sqlite3.connect(database)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS paths (
+            room TEXT NOT NULL,
+            version TEXT NOT NULL,
+            config TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            cost TEXT NOT NULL,
+            start INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            PRIMARY KEY (room, version, config, rank)
+        )
+    """)
+    return connection
+
+
+def store(connection, room, version, config, paths):
+    """Replace the stored paths for one (room, version, config)."""
+    with connection:
+        connection.execute(
+            "DELETE FROM paths WHERE room = ? AND version = ? AND config = ?",
+            (room, version, config))
+        connection.executemany(
+            "INSERT INTO paths VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(room, version, config, rank, str(cost), angle, str(path))
+             for rank, (cost, angle, path) in enumerate(paths)])
+
+
+def lookup(connection, room, version, config):
+    """
+    Stored paths for one (room, version, config), cheapest first, in the same
+    '(cost, angle, path)' form as angle_finder.collect_paths().
+    """
+
+    rows = connection.execute(
+        "SELECT cost, start, path FROM paths"
+        " WHERE room = ? AND version = ? AND config = ? ORDER BY rank",
+        (room, version, config))
+    return [(Decimal(cost), start, angle_finder.Path.parse(path)) for cost, start, path in rows]
+
+
+def precompute_all(connection, sample_size=1000, number=6):
+    for config, groups in MOTION_CONFIGS.items():
+        angle_finder.set_allowed_groups(groups)
+
+        for version in angle_finder.LINK_ADDRS:
+            targets = angle_finder.stale_reference_drop_targets(version)
+
+            for room, starts in angle_finder.starting_angles_switcher.items():
+                print(f"{config} / {version} / {room}")
+                paths = angle_finder.find_paths(list(starts), targets, sample_size, number)
+                store(connection, room, version, config, paths)
+
+
+if __name__ == "__main__":
+    connection = connect()
+
+    if len(sys.argv) == 4:
+        room, version, config = sys.argv[1:]
+        paths = lookup(connection, room, version, config)
+
+        for cost, angle, path in paths:
+            print(f"cost: {cost}\n-----")
+            description = angle_finder.starting_angles_switcher[room].get(angle, "")
+            angle_finder.print_path(angle, description, path)
+            print("-----\n")
+
+        if len(paths) == 0:
+            print("Nothing stored for that room, version and configuration.")
+    else:
+        precompute_all(connection)
@@ -0,0 +1,161 @@
+import json
+import sys
+import time
+
+import angle_finder
+from angle_finder import AngleSet, Path
+from precompute import MOTION_CONFIGS
+
+
+# GOLDEN RESULT REGRESSION CHECK
+#
+# Runs a fixed set of searches (every room in 'starting_angles_switcher', for
+# each configuration in precompute.MOTION_CONFIGS, to each set in TARGETS) and
+# records the best cost and the cheapest paths found, as well as how long each
+# search took.  A faster engine is acceptable if it gives the same results.
+#
+# The golden comes from find_paths(), which uses the offset graphs of
+# explore_linear() when only pure rotations are allowed.  With several starting
+# angles those can give other paths than explore() (see
+# angle_finder.LINEAR_GRAPHS), so for those configurations other engines only
+# need the same best cost.
+#
+#    python regression.py record           --- store current results as golden
+#    python regression.py [engine]         --- compare an engine to the golden
+#
+# where 'engine' is one of ENGINES (default "find_paths").
+
+GOLDEN = "regression_golden.json"
+
+SAMPLE_SIZE = 200
+NUMBER = 6
+
+TARGETS = {
+    "stale reference drop JP 1.1": angle_finder.stale_reference_drop_targets("JP 1.1"),
+    "targeting JP 1.1": AngleSet([0xBDCF, 0x1C07, 0x2D53]),
+}
+
+
+def explore_paths(starting_angles, targets, sample_size, number):
+    graph = angle_finder.explore(starting_angles, targets=targets)
+    return angle_finder.collect_target_paths(graph, targets, sample_size, number)
+
+
+def explore_fast_paths(starting_angles, targets, sample_size, number):
+    graph = angle_finder.explore_fast(starting_angles, targets=targets)
+    return angle_finder.collect_target_paths(graph, targets, sample_size, number)
+
+
+def stream_paths(starting_angles, targets, sample_size, number):
+    paths = []
+    for _, target_paths in angle_finder.stream_paths(starting_angles, targets, sample_size, number):
+        paths.extend(target_paths)
+    paths.sort()
+    return paths[:number]
+
+
+# name -> function(starting_angles, targets, sample_size, number) returning a
+# list of '(cost, angle, path)' like angle_finder.find_paths()
+ENGINES = {
+    "find_paths": angle_finder.find_paths,
+    "explore": explore_paths,
+    "explore_fast": explore_fast_paths,
+    "stream_paths": stream_paths,
+}
+
+
+def cases():
+    """Every '(key, groups, starting_angles, targets)' to run."""
+    for config, groups in MOTION_CONFIGS.items():
+        for target_name, targets in TARGETS.items():
+            for room, starts in angle_finder.starting_angles_switcher.items():
+                key = f"{config} / {target_name} / {room}"
+                yield key, groups, list(starts), targets
+
+
+def run(engine):
+    """Results of every case as '{key: {"best", "paths", "time", "linear"}}'."""
+
+    results = {}
+    groups_now = None
+
+    for key, groups, starting_angles, targets in cases():
+        if groups != groups_now:
+            angle_finder.set_allowed_groups(groups)
+            groups_now = groups
+
+        start = time.perf_counter()
+        paths = ENGINES[engine](starting_angles, targets, SAMPLE_SIZE, NUMBER)
+        elapsed = time.perf_counter() - start
+
+        results[key] = {
+            "best": str(paths[0][0]) if paths else None,
+            "paths": [[str(cost), angle, str(path)] for cost, angle, path in paths],
+            "time": round(elapsed, 3),
+            "linear": angle_finder.is_linear(),
+        }
+        print(f"{key}: {results[key]['best']} in {elapsed:.2f}s")
+
+    return results
+
+
+def compare(golden, results, engine="find_paths"):
+    """
+    Print the differences between two runs; True if there are none, apart
+    from paths that only find_paths() gives for linear configurations.
+    """
+
+    same = True
+    total_golden = total_now = 0
+
+    for key, expected in golden.items():
+        if key not in results:
+            continue
+        actual = results[key]
+        total_golden += expected["time"]
+        total_now += actual["time"]
+
+        status = "ok"
+        allowed = False  # whether the difference is expected
+        if actual["best"] != expected["best"]:
+            status = f"BEST COST {expected['best']} -> {actual['best']}"
+        elif actual["paths"] != expected["paths"]:
+            status = "PATHS DIFFER"
+            if engine != "find_paths" and actual["linear"]:
+                status = "paths differ (expected, linear engine)"
+                allowed = True
+        print(f"{expected['time']:8.2f}s {actual['time']:8.2f}s  {key}: {status}")
+
+        if status == "ok":
+            continue
+        if not allowed:
+            same = False
+
+        expected_paths = [tuple(p) for p in expected["paths"]]
+        actual_paths = [tuple(p) for p in actual["paths"]]
+        for cost, angle, path in expected_paths:
+            if (cost, angle, path) not in actual_paths:
+                print(f"        - {cost} from {angle:#06x}: {Path.parse(path)}")
+        for cost, angle, path in actual_paths:
+            if (cost, angle, path) not in expected_paths:
+                print(f"        + {cost} from {angle:#06x}: {Path.parse(path)}")
+
+    print(f"{total_golden:8.2f}s {total_now:8.2f}s  total (golden, now)")
+    return same
+
+
+if __name__ == "__main__":
+    engine = sys.argv[1] if len(sys.argv) > 1 else "find_paths"
+
+    if engine == "record":
+        with open(GOLDEN, "w") as f:
+            json.dump(run("find_paths"), f, indent=1)
+    elif engine not in ENGINES:
+        print(f"Unknown engine \"{engine}\", use one of: {', '.join(ENGINES)}")
+        sys.exit(2)
+    else:
+        with open(GOLDEN) as f:
+            golden = json.load(f)
+        same = compare(golden, run(engine), engine)
+        print("Same as golden." if same else "Results differ from golden!")
+        sys.exit(0 if same else 1)
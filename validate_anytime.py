@@ -0,0 +1,54 @@
+import time
+
+import angle_finder
+from regression import TARGETS
+
+
+# Checks that angle_finder.anytime_paths() streams.  Its timeout is what a
+# plain explore() to the targets takes, which is less than anytime_paths()
+# needs to settle every target, so it's stopped early; a path has to arrive
+# before the deadline anyway.  Nothing can beat both the lower bound and the
+# paths it gives, so the cheaper of the two has to be at most the best cost
+# explore() found.
+#
+#    python validate_anytime.py
+
+CASES = [
+    (["basic", "c-up"], "stale reference drop JP 1.1", "downstairs"),
+    (["basic", "c-up"], "targeting JP 1.1", "upstairs"),
+    (["basic", "target & cardinals available", "c-up"], "stale reference drop JP 1.1", "woods tree"),
+]
+
+
+def validate(groups, target_name, room):
+    angle_finder.set_allowed_groups(groups)
+    targets = TARGETS[target_name]
+    starting_angles = list(angle_finder.starting_angles_switcher[room])
+
+    start = time.perf_counter()
+    graph = angle_finder.explore(starting_angles, targets=targets)
+    timeout = time.perf_counter() - start
+    best = min(graph[angle].best for angle in targets if graph[angle].best is not None)
+
+    first = None  # '(seconds, cost)' of the first path
+    bounds = []
+    start = time.perf_counter()
+    for paths, lower_bound in angle_finder.anytime_paths(starting_angles, targets, timeout=timeout):
+        if first is None and paths:
+            first = (time.perf_counter() - start, paths[0][0])
+        if lower_bound is not None:
+            bounds.append(min([lower_bound] + [cost for cost, _, _ in paths]))
+
+    ok = (first is not None and first[0] < timeout
+          and all(bound <= best for bound in bounds))
+
+    print(f"{', '.join(groups)} / {target_name} / {room}: deadline {timeout:.2f}s, "
+          + (f"first path {first[1]} at {first[0]:.2f}s" if first else "no path")
+          + f", best {best}, lower bounds {', '.join(str(b) for b in bounds) or 'none'}"
+          + ("" if ok else "  <- FAILED"))
+    return ok
+
+
+if __name__ == "__main__":
+    results = [validate(*case) for case in CASES]
+    print("All streamed in time." if all(results) else "Some results came too late!")
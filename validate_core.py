@@ -0,0 +1,57 @@
+import time
+
+import angle_finder
+
+
+# Checks angle_finder.explore_fast() (the typed core in angle_core.py) against
+# angle_finder.explore(), from every room in 'starting_angles_switcher', for a
+# few motion configurations.  Reports any angle whose best cost differs.
+#
+# Costs of 100 or more are skipped: explore() works in 4 digit Decimals, so
+# e.g. 100.0 + 0.05 stays at 100.0 there, while the core's integers don't.
+#
+#    python validate_core.py
+
+CONFIGS = [
+    ["basic"],
+    ["basic", "c-up"],
+    ["basic", "target & cardinals available"],
+    ["basic", "target & cardinals available", "c-up", "us human transformation"],
+]
+
+
+def validate(groups, room, starting_angles):
+    angle_finder.set_allowed_groups(groups)
+
+    start = time.perf_counter()
+    graph = angle_finder.explore(starting_angles)
+    slow = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast_graph = angle_finder.explore_fast(starting_angles)
+    fast = time.perf_counter() - start
+
+    def comparable(cost):
+        return cost is not None and cost < 100
+
+    differences = [angle for angle in range(0xFFFF + 1)
+                   if graph[angle].best != fast_graph[angle].best
+                   and (comparable(graph[angle].best) or comparable(fast_graph[angle].best))]
+
+    print(f"{', '.join(groups)} / {room}: {len(differences)} differences, "
+          f"{slow:.2f}s explore() vs {fast:.2f}s explore_fast()")
+    for angle in differences[:5]:
+        print(f"    {angle:#06x}: {graph[angle].best} vs {fast_graph[angle].best}")
+
+    return len(differences) == 0
+
+
+if __name__ == "__main__":
+    compiled = not angle_finder.angle_core.__file__.endswith(".py")
+    print(f"angle_core is {'compiled' if compiled else 'not compiled'}")
+
+    results = [validate(groups, room, list(starts))
+               for groups in CONFIGS
+               for room, starts in angle_finder.starting_angles_switcher.items()]
+
+    print("All match." if all(results) else "Some results differ!")